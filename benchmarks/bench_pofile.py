@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+'''
+bench_pofile.py [ENTRIES]
+compare loading and saving a synthetic PO file with polib and lxgettext.pofile
+'''
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import polib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the checked out lxgettext, not an installed one
+sys.path.insert(0, ROOT)
+
+from corpus import generate_catalog  # noqa: E402
+from lxgettext import pofile  # noqa: E402
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    dpath = tempfile.mkdtemp()
+    try:
+        path = os.path.join(dpath, "messages.po")
+        generate_catalog(path, entries)
+
+        results = {}
+        for backend in (polib, pofile):
+            start = time.perf_counter()
+            po = backend.pofile(path)
+            loaded = time.perf_counter()
+            po.save(path + ".out")
+            saved = time.perf_counter()
+            with open(path + ".out", encoding="utf8") as f:
+                results[backend.__name__] = f.read()
+            load, save = loaded - start, saved - loaded
+            print("%-16s load %7.3fs %8.0f entries/s  save %7.3fs %8.0f "
+                  "entries/s" % (backend.__name__, load, entries / load,
+                                 save, entries / save))
+
+        assert results["polib"] == results["lxgettext.pofile"], \
+            "backends wrote different files"
+    finally:
+        shutil.rmtree(dpath)
+
+
+if __name__ == '__main__':
+    main()
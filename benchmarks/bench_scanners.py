@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+'''
+bench_scanners.py [FILES] [LINES]
+compare the line and mmap scanners on a synthetic source tree
+'''
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the checked out lxgettext, not an installed one
+sys.path.insert(0, ROOT)
+
+from corpus import generate_sources  # noqa: E402
+from lxgettext.lxgettext import (  # noqa: E402
+    DEFAULT_SCAN_OPTIONS, SCANNERS, scan_file,
+)
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    dpath = tempfile.mkdtemp()
+    try:
+        paths = generate_sources(dpath, files, lines)
+        size = sum(os.path.getsize(path) for path in paths)
+
+        results = {}
+        for scanner in SCANNERS:
+            options = DEFAULT_SCAN_OPTIONS._replace(scanner=scanner)
+            start = time.perf_counter()
+            results[scanner] = [scan_file(path, options) for path in paths]
+            elapsed = time.perf_counter() - start
+            print("%-8s %8.3fs %8.1f MB/s" % (
+                scanner, elapsed, size / elapsed / 1e6))
+
+        # the chunked scanner reports lineno:column
+        results['chunked'] = [
+            (path, [(match, int(lineno.split(':')[0]))
+                    for match, lineno in matches])
+            for path, matches in results['chunked']
+        ]
+        assert all(result == results['line'] for result in results.values()), \
+            "scanners produced different results"
+    finally:
+        shutil.rmtree(dpath)
+
+
+if __name__ == '__main__':
+    main()
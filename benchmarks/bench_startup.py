@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+'''
+bench_startup.py [--runs N] [--max-ms MS]
+time the imports of the command line tools with `python -X importtime`
+'''
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# the checked out lxgettext is imported, not an installed one
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# entry points, and modules they must not import at startup
+MODULES = {
+    'lxgettext.lxgettext': ('polib', 'multiprocessing', 'lxgettext.pofile',
+                            'lxgettext.tokenizer'),
+    'lxgettext.lpo2json': ('polib', 'pprint', 'lxgettext.lxgettext'),
+    'lxgettext.merge': ('polib', 'multiprocessing'),
+}
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n')[-1])
+    parser.add_argument('--runs', type=int, default=10,
+                        help='Runs per module, the median counts')
+    parser.add_argument('--top', type=int, default=5,
+                        help='Number of slowest imports to list')
+    parser.add_argument('--max-ms', type=float,
+                        help='Fail if a module takes longer to import')
+    return parser.parse_args()
+
+
+def import_times(module):
+    '''
+    Returns {module: (self microseconds, cumulative microseconds)} for an
+    import of `module` in a new interpreter
+    '''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        path for path in (ROOT, env.get('PYTHONPATH')) if path)
+    # time the imports from the bytecode cache, as installed packages are
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import %s' % module],
+        env=env, stderr=subprocess.PIPE, check=True, universal_newlines=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def main():
+    args = get_args()
+    failed = False
+    for module, forbidden in MODULES.items():
+        # the first run fills the bytecode cache
+        import_times(module)
+        runs = [import_times(module) for _ in range(args.runs)]
+        total = statistics.median(times[module][1] for times in runs) / 1000
+        print("%-22s %8.1f ms" % (module, total))
+
+        slowest = sorted(
+            runs[-1].items(), key=lambda item: item[1][0], reverse=True)
+        for name, (own, _) in slowest[:args.top]:
+            print("    %-30s %8.1f ms" % (name, own / 1000))
+
+        imported = [name for name in forbidden if name in runs[-1]]
+        if imported:
+            print("    imports %s at startup" % ", ".join(imported))
+            failed = True
+        if args.max_ms is not None and total > args.max_ms:
+            print("    slower than %s ms" % args.max_ms)
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
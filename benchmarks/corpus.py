@@ -0,0 +1,119 @@
+'''
+Deterministic synthetic source trees and PO catalogs for the benchmarks.
+The same arguments always produce the same files.
+'''
+
+import os
+import random
+
+from lxgettext import pofile
+
+WORDS = (
+    'account', 'browser', 'cancel', 'connect', 'download', 'error', 'join',
+    'leave', 'message', 'open', 'password', 'session', 'settings', 'share',
+    'start', 'user', 'visitor', 'window',
+)
+
+
+def msgid(i):
+    '''The i-th synthetic msgid.'''
+    rnd = random.Random(i)
+    words = ' '.join(rnd.choice(WORDS) for _ in range(1 + i % 6))
+    return '%s %d' % (words.capitalize(), i)
+
+
+def code_line(rnd, j, line_length):
+    line = '    var value%d = compute(value%d, %d);' % (j, j - 1, j)
+    while len(line) < line_length:
+        line += ' total += compute(%d, "%s");' % (
+            rnd.randrange(1000), rnd.choice(WORDS))
+    return line
+
+
+def generate_sources(dpath, files=200, lines=500, line_length=40, density=0.05,
+                     msgids=1000, vue=0.2, seed=0, keyword_files=1.0):
+    '''
+    Writes `files` JavaScript and Vue files of `lines` lines into `dpath`.
+    `density` is the share of lines with a gettext call in the share
+    `keyword_files` of the files, the others have none. The msgids of the
+    calls are taken from the first `msgids` synthetic ones.
+    Returns the paths of the files.
+    '''
+    rnd = random.Random(seed)
+    paths = []
+    for i in range(files):
+        is_vue = rnd.random() < vue
+        has_keywords = rnd.random() < keyword_files
+        path = os.path.join(dpath, 'src', 'module%d' % (i % 10),
+                            'component%d.%s' % (i, 'vue' if is_vue else 'js'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            if is_vue and has_keywords:
+                f.write('<template>\n  <div>{{ $gettext("%s") }}</div>\n'
+                        '</template>\n<script>\n'
+                        % msgid(rnd.randrange(msgids)))
+            elif is_vue:
+                f.write(
+                    '<template>\n  <div></div>\n</template>\n<script>\n')
+            for j in range(lines):
+                if has_keywords and rnd.random() < density:
+                    f.write("    label = gettext('%s');\n"
+                            % msgid(rnd.randrange(msgids)))
+                else:
+                    f.write(code_line(rnd, j, line_length) + '\n')
+            if is_vue:
+                f.write('</script>\n')
+        paths.append(path)
+    return paths
+
+
+def generate_catalog(path, entries=1000, translated=0.7, occurrences=3,
+                     language='nl', seed=0):
+    '''
+    Writes a PO file with the first `entries` synthetic msgids to `path`,
+    `translated` is the share of entries with a translation.
+    '''
+    rnd = random.Random(seed)
+    po = pofile.POFile()
+    po.metadata.update({
+        'Language': language,
+        'MIME-Version': '1.0',
+        'Content-Type': 'text/plain; charset=UTF-8',
+        'Content-Transfer-Encoding': '8bit',
+    })
+    for i in range(entries):
+        msgstr = ''
+        if rnd.random() < translated:
+            msgstr = '%s (%s)' % (msgid(i)[::-1], language)
+        entry = pofile.POEntry(msgid=msgid(i), msgstr=msgstr)
+        entry.occurrences = [
+            ('src/module%d/component%d.js' % (
+                rnd.randrange(10), rnd.randrange(1000)),
+             str(rnd.randrange(1, 1000)))
+            for _ in range(rnd.randrange(1, occurrences + 1))
+        ]
+        po.append(entry)
+    if not os.path.isdir(os.path.dirname(path) or '.'):
+        os.makedirs(os.path.dirname(path))
+    po.save(path)
+    return path
+
+
+def generate_locales(dpath, projects=3, languages=('de', 'fr', 'nl'),
+                     entries=1000, name='django.po'):
+    '''
+    Writes the `<project>/<lang>/LC_MESSAGES/<name>` catalogs of `projects`
+    projects sharing some of their msgids and translations into `dpath`.
+    Returns the locale directory of every project.
+    '''
+    locale_paths = []
+    for project in range(projects):
+        locale_path = os.path.join(dpath, 'project%d' % project)
+        for language in languages:
+            generate_catalog(
+                os.path.join(locale_path, language, 'LC_MESSAGES', name),
+                entries=entries, language=language, seed=project,
+            )
+        locale_paths.append(locale_path)
+    return locale_paths
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+'''
+run.py [--files N] [--lines N] [--line-length N] [--density D]
+       [--keyword-files S] [--entries N] [--repeat N] [--only NAME]
+       [--json FILE] [--compare FILE]
+time the extraction and the PO file tools on a synthetic corpus, report their
+throughput and peak memory and optionally compare them with an earlier run
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the checked out lxgettext, not an installed one, and the scripts
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'scripts')]
+
+import corpus  # noqa: E402
+import merge_translations  # noqa: E402
+from lxgettext import lpo2json, pofile  # noqa: E402
+from lxgettext.lxgettext import (  # noqa: E402
+    DEFAULT_SCAN_OPTIONS, SCANNERS, extract_matches, generate_po, get_msgids,
+    scan_file, update_po, with_defaults,
+)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n')[-1])
+    parser.add_argument('--files', type=int, default=200,
+                        help='Number of source files')
+    parser.add_argument('--lines', type=int, default=500,
+                        help='Lines per source file')
+    parser.add_argument('--line-length', type=int, default=40,
+                        help='Length of the code lines')
+    parser.add_argument('--density', type=float, default=0.05,
+                        help='Share of the lines with a gettext call')
+    parser.add_argument('--keyword-files', type=float, default=1.0,
+                        help='Share of the files with any gettext calls')
+    parser.add_argument('--entries', type=int, default=5000,
+                        help='Entries per PO file')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per benchmark, the best counts')
+    parser.add_argument('--only', action='append',
+                        help='Run only the benchmarks starting with NAME')
+    parser.add_argument('--json', metavar='FILE',
+                        help='Write the results to FILE')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='Compare with the results in FILE')
+    return parser.parse_args()
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(run, setup=None, repeat=3):
+    '''
+    Returns the best time of `repeat` calls of `run` and the peak memory
+    allocated by one more call, `setup` is called untimed before each one
+    '''
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+class Suite(object):
+
+    def __init__(self, dpath, args):
+        self.dpath = dpath
+        self.args = args
+        self.paths = corpus.generate_sources(
+            os.path.join(dpath, 'tree'), files=args.files, lines=args.lines,
+            line_length=args.line_length, density=args.density,
+            msgids=args.entries * 2, keyword_files=args.keyword_files,
+        )
+        self.sources = []
+        for path in self.paths:
+            with io.open(path, 'r', encoding='utf8') as f:
+                self.sources.append((path, f.read()))
+        self.size = sum(len(data.encode('utf8')) for _, data in self.sources)
+
+        self.catalog = corpus.generate_catalog(
+            os.path.join(dpath, 'catalog.po'), entries=args.entries)
+        self.locale_paths = corpus.generate_locales(
+            os.path.join(dpath, 'locale'), entries=args.entries)
+        self.output = os.path.join(dpath, 'messages.po')
+
+    def sources_result(self):
+        return {'files': len(self.paths), 'bytes': self.size}
+
+    def bench_get_msgids(self):
+        def run():
+            for _, data in self.sources:
+                for _ in get_msgids(data.split('\n')):
+                    pass
+        return run, None, self.sources_result()
+
+    def bench_generate_po(self):
+        def run():
+            for path, data in self.sources:
+                generate_po(data, path)
+        return run, None, self.sources_result()
+
+    def bench_scan_file(self, scanner):
+        options = DEFAULT_SCAN_OPTIONS._replace(scanner=scanner)
+
+        def run():
+            for path in self.paths:
+                scan_file(path, options)
+        return run, None, self.sources_result()
+
+    def bench_extract_matches(self):
+        args = with_defaults(argparse.Namespace())
+        # keep the result alive, so that the peak includes the occurrences
+        result = []
+
+        def run():
+            result[:] = [extract_matches(self.paths, args)]
+        return run, None, self.sources_result()
+
+    def bench_update_po(self, prune=False):
+        def setup():
+            shutil.copyfile(self.catalog, self.output)
+
+        def run():
+            args = with_defaults(argparse.Namespace(
+                output=self.output, prune=prune, version='bench',
+                language='nl'))
+            with contextlib.redirect_stdout(io.StringIO()):
+                update_po(self.paths, args)
+        return run, setup, dict(
+            self.sources_result(), entries=self.args.entries)
+
+    def bench_lpo2json(self):
+        argv = ['lpo2json', self.catalog,
+                '-o', os.path.join(self.dpath, 'catalog.json')]
+
+        def run():
+            old_argv, sys.argv = sys.argv, argv
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    lpo2json.main()
+            finally:
+                sys.argv = old_argv
+        return run, None, {
+            'bytes': os.path.getsize(self.catalog),
+            'entries': self.args.entries,
+        }
+
+    def bench_combine_pofiles(self):
+        paths = [
+            os.path.join(locale_path, 'nl', 'LC_MESSAGES', 'django.po')
+            for locale_path in self.locale_paths
+        ]
+
+        def run():
+            po_files = [pofile.pofile(path) for path in paths]
+            merge_translations.combine_pofiles(po_files, language='nl')
+        return run, None, {
+            'files': len(paths),
+            'bytes': sum(os.path.getsize(path) for path in paths),
+            'entries': self.args.entries * len(paths),
+        }
+
+    def benchmarks(self):
+        yield 'get_msgids', self.bench_get_msgids
+        yield 'generate_po', self.bench_generate_po
+        for scanner in SCANNERS:
+            yield ('scan_file[%s]' % scanner,
+                   lambda scanner=scanner: self.bench_scan_file(scanner))
+        yield 'extract_matches', self.bench_extract_matches
+        yield 'update_po', self.bench_update_po
+        yield 'update_po[prune]', lambda: self.bench_update_po(prune=True)
+        yield 'lpo2json.main', self.bench_lpo2json
+        yield 'combine_pofiles', self.bench_combine_pofiles
+
+
+def get_result(seconds, peak, counts):
+    result = {'seconds': round(seconds, 6), 'peak_kb': peak // 1024}
+    if 'files' in counts:
+        result['files_per_s'] = round(counts['files'] / seconds, 1)
+    if 'bytes' in counts:
+        result['mb_per_s'] = round(counts['bytes'] / seconds / 1e6, 3)
+    if 'entries' in counts:
+        result['entries_per_s'] = round(counts['entries'] / seconds, 1)
+    return result
+
+
+def main():
+    args = get_args()
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+
+    dpath = tempfile.mkdtemp()
+    results = {}
+    try:
+        suite = Suite(dpath, args)
+        print("%-20s %9s %10s %9s %12s %10s %8s" % (
+            'benchmark', 'seconds', 'files/s', 'MB/s', 'entries/s', 'peak KB',
+            'change'))
+        for name, bench in suite.benchmarks():
+            if args.only and not any(
+                    name.startswith(only) for only in args.only):
+                continue
+            run, setup, counts = bench()
+            result = results[name] = get_result(
+                *measure(run, setup, args.repeat), counts=counts)
+            change = ''
+            if name in previous:
+                ratio = result['seconds'] / previous[name]['seconds']
+                change = '%+.1f%%' % ((ratio - 1) * 100)
+            print("%-20s %9.4f %10s %9s %12s %10d %8s" % (
+                name, result['seconds'], result.get('files_per_s', '-'),
+                result.get('mb_per_s', '-'), result.get('entries_per_s', '-'),
+                result['peak_kb'], change))
+    finally:
+        shutil.rmtree(dpath)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'commit': get_commit(),
+                'python': platform.python_version(),
+                'parameters': {
+                    key: getattr(args, key)
+                    for key in ('files', 'lines', 'line_length', 'density',
+                                'entries', 'repeat')
+                },
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
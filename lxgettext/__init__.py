@@ -0,0 +1,10 @@
+__all__ = ['Message', 'UpdateResult', 'extract', 'update_catalog']
+
+
+def __getattr__(name):
+    # the API is imported on first use, so that the command line tools don't
+    # pay for it
+    if name in __all__:
+        from . import api
+        return getattr(api, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
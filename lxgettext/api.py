@@ -0,0 +1,111 @@
+"""
+Python API for build tools calling lxgettext in-process.
+
+Nothing is printed: files that can't be scanned are skipped silently unless
+on_error='warn' or 'fail' is given. The compiled patterns, parser defaults
+and extraction caches are kept between calls, so a long-lived process can
+call `extract` and `update_catalog` repeatedly without paying for them again.
+"""
+
+import argparse
+import functools
+import os
+from collections import namedtuple
+
+from .cache import ExtractionCache
+from .lxgettext import (
+    KEYWORD, get_cache_signature, get_defaults, get_scan_options, iter_paths,
+    scan_paths, update_po, with_defaults,
+)
+
+# a string found in a source file
+Message = namedtuple('Message', ['msgid', 'path', 'lineno'])
+
+# outcome of `update_catalog`: the number of msgids extracted, of entries
+# added to the PO files, whether any of them changed and a MergeResult for
+# every PO file
+UpdateResult = namedtuple(
+    'UpdateResult', ['messages', 'new_entries', 'changed', 'catalogs'])
+
+
+def get_options(**options):
+    """
+    Returns the options namespace of the command line interface, with
+    `options` given by the dest of their long option, e.g. sort_output.
+    Skipped files are not reported unless `on_error` is given.
+    """
+    unknown = set(options) - set(get_defaults())
+    if unknown:
+        raise TypeError("Unknown options: %s" % ", ".join(sorted(unknown)))
+    options.setdefault('on_error', 'skip')
+    return with_defaults(argparse.Namespace(**options))
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache(directory, signature, verify=False):
+    """
+    Returns the ExtractionCache of `directory`, loaded only once
+    """
+    return ExtractionCache(directory, signature, verify=verify)
+
+
+def _paths(paths):
+    return [paths] if isinstance(paths, str) else paths
+
+
+def _keywords(keywords):
+    return (keywords,) if isinstance(keywords, str) else tuple(keywords)
+
+
+def extract(paths, keywords=(KEYWORD,), jobs=1, cache_dir=None, **options):
+    """
+    Generates a Message for every call of the functions in `keywords` found
+    in the files and directories at `paths`, in the order they are found.
+    Files are scanned by `jobs` processes, 0 means one per core. With
+    `cache_dir`, results are reused from and stored in an extraction cache.
+    The other `options` are the ones of the command line, e.g.
+    include=['*.js'] or parser='tokenizer'.
+    """
+    args = get_options(keywords=_keywords(keywords), jobs=jobs, **options)
+    cache = None
+    if cache_dir is not None:
+        cache = get_cache(os.path.abspath(cache_dir),
+                          get_cache_signature(args), args.cache_verify)
+
+    paths = iter_paths(_paths(paths), args.include, args.exclude)
+    try:
+        for path, matches in scan_paths(
+                paths, args.jobs, cache, get_scan_options(args)):
+            for msgid, lineno in matches or ():
+                yield Message(msgid, path, lineno)
+    finally:
+        if cache is not None:
+            cache.save()
+
+
+def update_catalog(paths, output=None, locale_dir=None, keywords=(KEYWORD,),
+                   jobs=1, cache_dir=None, stats=None, **options):
+    """
+    Updates the PO file `output`, or the ones of the languages in
+    `locale_dir`, with the strings in the files and directories at `paths`.
+    The other `options` are the ones of the command line, e.g. prune=True,
+    pot=True or languages='de,nl'. Timings are recorded in the Stats `stats`.
+    Returns an UpdateResult.
+    """
+    if not output and not locale_dir:
+        raise ValueError("An output or a locale_dir is required")
+    args = get_options(
+        output=output, locale_dir=locale_dir, keywords=_keywords(keywords),
+        jobs=jobs, **options)
+    cache = None
+    if cache_dir is not None:
+        cache = get_cache(os.path.abspath(cache_dir),
+                          get_cache_signature(args), args.cache_verify)
+
+    catalogs = update_po(_paths(paths), args, cache, stats)
+    return UpdateResult(
+        messages=catalogs[0].extracted if catalogs else 0,
+        new_entries=sum(catalog.new_entries for catalog in catalogs),
+        changed=any(catalog.changed for catalog in catalogs),
+        catalogs=catalogs,
+    )
@@ -0,0 +1,105 @@
+import io
+import json
+import os
+
+CACHE_FILENAME = "matches.json"
+
+# bump when the layout of the cache file changes
+CACHE_VERSION = 1
+
+
+def get_digest(path):
+    """
+    Returns the sha1 hex digest of the contents of the file at `path`
+    """
+    import hashlib
+
+    digest = hashlib.sha1()
+    with io.open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractionCache(object):
+    """
+    On-disk store of the (match, lineno) pairs found in every source file.
+
+    Entries are keyed by the absolute path of the file and are valid as long
+    as its size and mtime are unchanged. With `verify`, a content hash is
+    compared instead of the mtime, so files that were touched (e.g. by a
+    fresh checkout) but not modified are still served from the cache.
+    The whole cache is discarded when `signature` (a summary of the
+    extraction configuration) differs from the one it was written with.
+    """
+
+    def __init__(self, directory, signature, verify=False):
+        self.path = os.path.join(directory, CACHE_FILENAME)
+        self.signature = "%s:%s" % (CACHE_VERSION, signature)
+        self.verify = verify
+        self.files = {}
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        try:
+            with io.open(self.path, 'r', encoding='utf8') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        if data.get("signature") == self.signature:
+            self.files = data["files"]
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        data = {"signature": self.signature, "files": self.files}
+        tmp_path = "%s.%s.tmp" % (self.path, os.getpid())
+        with io.open(tmp_path, 'w', encoding='utf8') as f:
+            f.write(json.dumps(data, ensure_ascii=False))
+        os.replace(tmp_path, self.path)
+
+    def stamp(self, path, max_file_size=0):
+        """
+        Returns the [size, mtime, digest] list identifying the current
+        contents of `path`. Files larger than `max_file_size` bytes (unless
+        0) are not hashed and have no digest.
+        """
+        stat = os.stat(path)
+        digest = None
+        if self.verify and not (max_file_size and
+                                stat.st_size > max_file_size):
+            digest = get_digest(path)
+        return [stat.st_size, stat.st_mtime_ns, digest]
+
+    def lookup(self, path, max_file_size=0):
+        """
+        Returns (stamp, matches) for `path`, where matches is None if the
+        file has to be scanned again. Files larger than `max_file_size`
+        bytes (unless 0) always have to be.
+        """
+        stamp = self.stamp(path, max_file_size)
+        entry = self.files.get(os.path.abspath(path))
+        matches = None
+        if entry is not None and not (max_file_size and
+                                      stamp[0] > max_file_size):
+            size, mtime, digest = entry["stamp"]
+            if self.verify:
+                fresh = size == stamp[0] and digest == stamp[2]
+            else:
+                fresh = size == stamp[0] and mtime == stamp[1]
+            if fresh:
+                matches = [tuple(match) for match in entry["matches"]]
+        if matches is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return stamp, matches
+
+    def store(self, path, stamp, matches):
+        self.files[os.path.abspath(path)] = {
+            "stamp": stamp,
+            "matches": matches,
+        }
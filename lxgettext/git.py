@@ -0,0 +1,50 @@
+"""
+Finding the files that changed since a git revision, for `--since`.
+"""
+
+import os
+import subprocess
+
+
+def git(*args):
+    return subprocess.check_output(('git',) + args, stderr=subprocess.PIPE)
+
+
+def is_revision(ref):
+    """
+    Returns whether `ref` names a commit in the git repository of the
+    current directory
+    """
+    try:
+        git('rev-parse', '--verify', '--quiet', ref + '^{commit}')
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return True
+
+
+def get_changes(ref):
+    """
+    Returns (changed paths, deleted paths) of the files that differ between
+    the revision `ref` and the working tree, relative to the current
+    directory. Untracked files count as changed, a renamed file as its old
+    path deleted and its new path changed.
+    """
+    changed = []
+    deleted = []
+    output = git('diff', '--name-status', '-z', '--relative', '-M', ref, '--')
+    fields = iter(output.split(b'\0'))
+    for status in fields:
+        if not status:
+            continue
+        path = os.fsdecode(next(fields))
+        if status.startswith(b'R'):
+            deleted.append(path)
+            changed.append(os.fsdecode(next(fields)))
+        elif status == b'D':
+            deleted.append(path)
+        else:
+            changed.append(path)
+
+    output = git('ls-files', '-z', '--others', '--exclude-standard')
+    changed.extend(os.fsdecode(path) for path in output.split(b'\0') if path)
+    return changed, deleted
@@ -0,0 +1,95 @@
+"""
+Keyword specs in the syntax of xgettext's `--keyword`.
+
+`ngettext:1,2` extracts the first argument of `ngettext(...)` calls as the
+msgid and the second one as its plural, `pgettext:1c,2` the first argument as
+the context and the second one as the msgid. A plain name is the same as
+`name:1`.
+
+A message with a plural or a context is represented by a single string, like
+in MO files: "msgctxt\\x04msgid\\x00msgid_plural". Messages without either are
+plain msgids, so the scanners, the extraction cache and the PO file merging
+can keep treating them as opaque strings.
+"""
+
+from collections import namedtuple
+
+CONTEXT_SEPARATOR = '\x04'
+PLURAL_SEPARATOR = '\x00'
+
+# the 1-based argument positions of the msgid, the plural (or None) and the
+# context (or None) in the calls of the function `name`
+KeywordSpec = namedtuple('KeywordSpec', ['name', 'msgid', 'plural', 'context'])
+
+
+def parse_keyword(spec):
+    """
+    Returns the KeywordSpec of the string `spec`, raises ValueError if it is
+    not valid
+    """
+    name, _, positions = spec.partition(':')
+    if not name or not all(part.isalnum() or part in '_$' for part in name):
+        raise ValueError("Invalid keyword name %r" % name)
+    if not positions:
+        return KeywordSpec(name, 1, None, None)
+
+    arguments = []
+    context = None
+    for position in positions.split(','):
+        if position.endswith('c') and position[:-1].isdigit():
+            if context is not None:
+                raise ValueError("More than one context in %r" % spec)
+            context = int(position[:-1])
+        elif position.isdigit():
+            arguments.append(int(position))
+        else:
+            raise ValueError("Invalid argument %r in %r" % (position, spec))
+    if not 1 <= len(arguments) <= 2:
+        raise ValueError("%r needs a msgid and at most a plural" % spec)
+    positions = arguments + ([context] if context else [])
+    if 0 in positions or len(set(positions)) < len(positions):
+        raise ValueError("Invalid arguments in %r" % spec)
+    arguments.append(None)
+    return KeywordSpec(name, arguments[0], arguments[1], context)
+
+
+def get_arity(spec):
+    """
+    Returns the number of leading arguments of a call that `spec` uses
+    """
+    return max(position for position in spec[1:] if position)
+
+
+def join_msgid(msgid, msgid_plural=None, msgctxt=None):
+    """
+    Returns the string representing a message
+    """
+    if msgctxt is not None:
+        msgid = msgctxt + CONTEXT_SEPARATOR + msgid
+    if msgid_plural:
+        msgid += PLURAL_SEPARATOR + msgid_plural
+    return msgid
+
+
+def split_msgid(match):
+    """
+    Returns (msgctxt, msgid, msgid_plural) of the message `match`, with None
+    for a missing context or plural
+    """
+    msgctxt = msgid_plural = None
+    if CONTEXT_SEPARATOR in match:
+        msgctxt, match = match.split(CONTEXT_SEPARATOR, 1)
+    if PLURAL_SEPARATOR in match:
+        match, msgid_plural = match.split(PLURAL_SEPARATOR, 1)
+    return msgctxt, match, msgid_plural
+
+
+def get_message(args, spec):
+    """
+    Returns the message of a call of `spec` with the string `args`
+    """
+    return join_msgid(
+        args[spec.msgid - 1],
+        args[spec.plural - 1] if spec.plural else None,
+        args[spec.context - 1] if spec.context else None,
+    )
@@ -2,13 +2,13 @@ import argparse
 import io
 import json
 import os
-import pprint
-
-import polib
 
 COLOUR_GREEN = '\033[92m'
 COLOUR_END = '\033[0m'
 
+# like lxgettext's --po-backend, without importing lxgettext.lxgettext
+PO_BACKENDS = ('native', 'polib')
+
 
 def valid_path(path):
     if not os.path.exists(path):
@@ -31,23 +31,48 @@ def get_args():
         action='store',
         help='Path to the *json file'
     )
+    parser.add_argument(
+        '--po-backend',
+        default='native',
+        choices=PO_BACKENDS,
+        help="Library reading PO files: the built-in 'native' one or "
+        "'polib' (default: %(default)s)"
+    )
     args = parser.parse_args()
     return args
 
 
-def main():
-    args = get_args()
-    po = polib.pofile(args.path)
+def get_translations(po):
+    """
+    Returns a dict mapping the msgids of the translated entries of `po` to
+    their msgstr
+    """
     po_dict = {}
     for entry in po:
         if len(entry.msgstr) > 0:
             po_dict[entry.msgid] = entry.msgstr
+    return po_dict
+
+
+def write_json(po_dict, path):
+    with io.open(path, "w", encoding="utf8") as f:
+        data = json.dumps(po_dict, ensure_ascii=False)
+        f.write(str(data))
+
+
+def main():
+    args = get_args()
+    if args.po_backend == 'polib':
+        import polib as backend
+    else:
+        from . import pofile as backend
+    po = backend.pofile(args.path)
+    po_dict = get_translations(po)
     if args.output:
-        with io.open(args.output, "w", encoding="utf8") as f:
-            data = json.dumps(po_dict, ensure_ascii=False)
-            f.write(str(data))
+        write_json(po_dict, args.output)
         print(COLOUR_GREEN + "%s: %s empty" % (args.output, len(po) - len(po_dict)) + COLOUR_END)
     else:
+        import pprint
         pprint.pprint(po_dict)
 
 
@@ -1,25 +1,187 @@
 import argparse
-import datetime
+import bisect
+import fnmatch
+import functools
+import importlib
 import io
+import itertools
+import mmap
 import os
 import re
-from collections import OrderedDict
+import sys
+import time
+from collections import OrderedDict, namedtuple
 
-import polib
+from .cache import ExtractionCache
+from .keywords import (
+    get_arity, get_message, join_msgid, parse_keyword, split_msgid,
+)
+from .occurrences import Occurrences, parse_lineno
 
 COLOUR_GREEN = '\033[92m'
 COLOUR_END = '\033[0m'
 
 KEYWORD = "gettext"
-gettext_re = re.compile("""%s\\(['"](.+?)['"]\\)""" % KEYWORD)
 
-now = datetime.datetime.today().strftime("%Y-%m-%d %X%z")
+# longest msgid found by the chunked scanner, which bounds its lookahead
+MAX_MSGID_LENGTH = 4096
+
+# most whitespace around the commas between arguments found by the chunked
+# scanner
+MAX_SPACE_LENGTH = 64
+
+# the regular expressions matching the calls of a set of keywords: `text`
+# for str, `bytes` for the mmap scanner and `bounded` for the chunked one.
+# `key` returns the message of a match, None if it is the first group,
+# `length` is the longest match of `bounded` and every match contains one of
+# the strings in `literals`.
+Patterns = namedtuple(
+    'Patterns', ['text', 'bytes', 'bounded', 'key', 'length', 'literals'])
+
+
+@functools.lru_cache(maxsize=None)
+def get_patterns(keywords=(KEYWORD,)):
+    """
+    Returns the Patterns for the tuple of keyword specs `keywords`, e.g.
+    ('gettext', 'ngettext:1,2'), compiled only once per process. All
+    keywords are matched by a single regular expression.
+    """
+    specs = OrderedDict()
+    for keyword in keywords:
+        spec = parse_keyword(keyword)
+        specs[spec.name] = spec
+    arities = OrderedDict()
+    for spec in specs.values():
+        arities.setdefault(get_arity(spec), []).append(spec.name)
+
+    string = """['"](.+?)['"]"""
+    space = '\\s*'
+    length = 0
+    if list(arities) == [1]:
+        # the match is the msgid, the names don't need a group
+        names = '|'.join(re.escape(name) for name in arities[1])
+        if len(arities[1]) > 1:
+            names = '(?:%s)' % names
+        pattern = """%s\\(%s\\)""" % (names, string)
+        key = None
+    else:
+        alternatives = []
+        for arity, names in arities.items():
+            names = '|'.join(re.escape(name) for name in names)
+            if arity == 1:
+                # a single string argument
+                alternatives.append("""(%s)\\(%s\\)""" % (names, string))
+            else:
+                # the first `arity` arguments are strings
+                separator = "%s,%s" % (space, space)
+                alternatives.append("""(%s)\\(%s%s%s[,)]""" % (
+                    names, space, separator.join([string] * arity), space))
+        pattern = '|'.join(alternatives)
+        # the keyword and argument groups of every alternative, by the
+        # index of the last group
+        groups = {}
+        index = 1
+        for arity, names in arities.items():
+            groups[index + arity] = (
+                index, range(index + 1, index + arity + 1))
+            index += arity + 1
+        key = functools.partial(_get_message, groups, specs)
+    for arity, names in arities.items():
+        length = max(length, max(len(name) for name in names) + arity * (
+            MAX_MSGID_LENGTH + 3 + 2 * MAX_SPACE_LENGTH) + 2)
+    # a name containing a shorter one, like ngettext, needs no search
+    literals = []
+    for name in sorted(specs, key=len):
+        if not any(literal in name for literal in literals):
+            literals.append(name)
+    return Patterns(
+        text=re.compile(pattern),
+        bytes=re.compile(pattern.encode('utf8')),
+        bounded=re.compile(pattern.replace(
+            '.+?', '.{1,%d}?' % MAX_MSGID_LENGTH).replace(
+            '\\s*', '\\s{0,%d}' % MAX_SPACE_LENGTH)),
+        key=key,
+        length=length,
+        literals=tuple(literals),
+    )
+
+
+def _get_message(groups, specs, match):
+    name, arguments = groups[match.lastindex]
+    name = match.group(name)
+    arguments = [match.group(index) for index in arguments]
+    if isinstance(name, bytes):
+        name = name.decode('utf8')
+        arguments = [argument.decode('utf8') for argument in arguments]
+    return get_message(arguments, specs[name])
+
+
+gettext_re, gettext_bytes_re, gettext_bounded_re = get_patterns()[:3]
+
+# number of characters read at once by the chunked scanner
+CHUNK_SIZE = 1 << 20
+
+# number of bytes at the start of a file searched for NUL characters, which
+# mark it as binary
+SNIFF_SIZE = 1024
+
+PARSERS = ('regex', 'tokenizer')
+# what happens to files that can't be read or decoded: skipped silently,
+# skipped with a warning, or the run fails
+ON_ERROR = ('skip', 'warn', 'fail')
+# what the `#:` comments of the entries list, like xgettext's --add-location
+LOCATIONS = ('full', 'file', 'never')
+SCANNERS = ('line', 'mmap', 'chunked')
+
+# modules reading and writing PO files with the API of polib, imported by
+# `get_po_backend` when they are needed
+PO_BACKENDS = OrderedDict((('native', 'lxgettext.pofile'), ('polib', 'polib')))
+
+# options that affect what `scan_file` extracts from a file
+ScanOptions = namedtuple(
+    'ScanOptions',
+    ['parser', 'scanner', 'max_line_length', 'file_timeout', 'keywords',
+     'max_file_size', 'on_error'])
+DEFAULT_SCAN_OPTIONS = ScanOptions(
+    parser='regex', scanner='line', max_line_length=0, file_timeout=0,
+    keywords=(KEYWORD,), max_file_size=0, on_error='warn')
+
+# number of files handed to a worker process at once by `scan_paths`
+SCAN_CHUNKSIZE = 16
+
+# outcome of updating one PO file
+MergeResult = namedtuple(
+    'MergeResult',
+    ['path', 'new_entries', 'entries_before', 'entries_after', 'changed',
+     'timings', 'extracted'])
+
+# headers that are updated on every run and don't count as a change
+TIMESTAMP_HEADER_RE = re.compile(
+    r'^"(?:POT-Creation-Date|PO-Revision-Date): .*"\n', re.MULTILINE)
+
+# exit status with --exit-code when a PO file was changed
+EXIT_CHANGED = 1
+
+# callbacks registered with `add_hook`, by event
+HOOK_EVENTS = ('on_file_start', 'on_file_done', 'on_match', 'on_save')
+hooks = {event: [] for event in HOOK_EVENTS}
+
+# timestamp written to the PO files, see `get_now`
+now = None
 
 INFO_TEMPLATE = """#: {occurrence}
 msgid "{msgid}"
 msgstr ""
 """
 
+# the lines of INFO_TEMPLATE for messages with a context or a plural
+CONTEXT_TEMPLATE = """msgctxt "{msgctxt}"
+"""
+PLURAL_TEMPLATE = """msgid_plural "{msgid_plural}"
+msgstr[0] ""
+msgstr[1] ""
+"""
+
 
 def valid_path(path):
     if not os.path.exists(path):
@@ -27,7 +189,22 @@ def valid_path(path):
     return path
 
 
-def get_args():
+def non_negative_int(value):
+    if not value.isdigit():
+        raise argparse.ArgumentTypeError(
+            "%s is not a non-negative integer" % value)
+    return int(value)
+
+
+def keyword_spec(value):
+    try:
+        parse_keyword(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def get_parser():
     parser = argparse.ArgumentParser(
         "Extract gettext records from the files using `gettext(...)` as a"
         "keyword"
@@ -35,10 +212,11 @@ def get_args():
     parser.add_argument(
         "path",
         metavar="PATH",
-        nargs="+",
+        nargs="*",
         type=valid_path,
         action='store',
-        help='Path to the file to extract gettext from'
+        help='Path to the file to extract gettext from, directories are '
+        'searched recursively'
     )
     parser.add_argument(
         '-p', '--prune',
@@ -52,6 +230,94 @@ def get_args():
         action='store',
         help='Path to the *po file'
     )
+    parser.add_argument(
+        '--pot',
+        action='store_true',
+        help='Write OUTPUT as a template (POT) without translations, to be '
+        'merged into the PO files with lxgettext-merge'
+    )
+    location = parser.add_mutually_exclusive_group()
+    location.add_argument(
+        '--add-location',
+        metavar='TYPE',
+        default='full',
+        choices=LOCATIONS,
+        help="Which occurrences of the entries are written to OUTPUT: "
+        "'full' paths and line numbers, only the 'file' paths or 'never' "
+        "(default: %(default)s)"
+    )
+    location.add_argument(
+        '--no-location',
+        dest='add_location',
+        default='full',
+        action='store_const',
+        const='never',
+        help='Same as --add-location=never'
+    )
+    parser.add_argument(
+        '--max-occurrences',
+        metavar='N',
+        default=0,
+        type=non_negative_int,
+        help='Write at most N occurrences per entry, the first ones in '
+        'path and line order; 0 for all of them (default: %(default)s)'
+    )
+    sorting = parser.add_mutually_exclusive_group()
+    sorting.add_argument(
+        '--sort-output',
+        action='store_true',
+        help='Sort the entries in OUTPUT by msgid instead of keeping them '
+        'in the order they were first found'
+    )
+    sorting.add_argument(
+        '--sort-by-file',
+        action='store_true',
+        help='Sort the entries in OUTPUT by their first occurrence, entries '
+        'without occurrences last'
+    )
+    parser.add_argument(
+        '--skip-unchanged',
+        action='store_true',
+        help='Leave OUTPUT untouched, including its modification time, when '
+        'only its timestamp headers would change'
+    )
+    parser.add_argument(
+        '--exit-code',
+        action='store_true',
+        help='Exit with status %d if OUTPUT changed in more than its '
+        'timestamp headers, implies --skip-unchanged' % EXIT_CHANGED
+    )
+    parser.add_argument(
+        '--po-backend',
+        default='native',
+        choices=PO_BACKENDS,
+        help="Library reading and writing PO files: the built-in 'native' "
+        "one or 'polib' (default: %(default)s)"
+    )
+    parser.add_argument(
+        '--locale-dir',
+        metavar='DIR',
+        default=False,
+        action='store',
+        help='Update the PO file of every language in DIR instead of a '
+        'single OUTPUT, scanning the sources only once'
+    )
+    parser.add_argument(
+        '--path-template',
+        metavar='TEMPLATE',
+        default='{lang}/LC_MESSAGES/messages.po',
+        action='store',
+        help='Path of the PO files relative to the --locale-dir, {lang} is '
+        'replaced with the language (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--languages',
+        metavar='LANG[,LANG...]',
+        default=False,
+        action='store',
+        help='Comma separated languages to update in the --locale-dir, '
+        'by default all languages that already have a PO file'
+    )
     parser.add_argument(
         '-v', '--version',
         default=False,
@@ -64,33 +330,312 @@ def get_args():
         action='store',
         help='Language of the source file'
     )
+    parser.add_argument(
+        '-j', '--jobs',
+        default=1,
+        type=non_negative_int,
+        action='store',
+        help='Number of processes used to scan the input PATHs, 0 to use '
+        'all available cores'
+    )
+    parser.add_argument(
+        '-k', '--keyword',
+        metavar='WORD[:SPEC]',
+        dest='keywords',
+        default=[KEYWORD],
+        type=keyword_spec,
+        action='append',
+        help="Also extract the calls of WORD, can be repeated. SPEC gives "
+        "the argument positions like xgettext: 'ngettext:1,2' for a msgid "
+        "and its plural, 'pgettext:1c,2' for a context and a msgid "
+        "(default: %s)" % KEYWORD
+    )
+    parser.add_argument(
+        '--parser',
+        default='regex',
+        choices=PARSERS,
+        help="How gettext calls are recognised: 'regex' matches the call "
+        "anywhere, 'tokenizer' parses JavaScript and Vue/HTML and ignores "
+        "comments and strings (default: %(default)s)"
+    )
+    parser.add_argument(
+        '--scanner',
+        default='line',
+        choices=SCANNERS,
+        help="How files are scanned by the regex parser: 'line' by line, "
+        "'mmap' to search the whole memory-mapped file at once, or 'chunked' "
+        "to read it in blocks and report line:column occurrences (default: "
+        "%(default)s)"
+    )
+    parser.add_argument(
+        '--max-line-length',
+        metavar='N',
+        default=0,
+        type=non_negative_int,
+        help='Scan files with lines longer than N characters, such as '
+        'minified bundles, with the chunked scanner; 0 to disable '
+        '(default: %(default)s)'
+    )
+    parser.add_argument(
+        '--file-timeout',
+        metavar='SECONDS',
+        default=0,
+        type=float,
+        help='Skip files that take longer than SECONDS to scan; 0 to '
+        'disable. Files with lines longer than %d characters are then '
+        'scanned with the chunked scanner, and so are all files with '
+        '--scanner=mmap (default: %%(default)s)' % MAX_MSGID_LENGTH
+    )
+    parser.add_argument(
+        '--max-file-size',
+        metavar='BYTES',
+        default=0,
+        type=non_negative_int,
+        help='Skip files larger than BYTES without reading them; 0 to '
+        'disable (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--on-error',
+        default='warn',
+        choices=ON_ERROR,
+        help="What to do with files that can't be read or aren't valid "
+        "UTF-8: 'skip' them, skip them with a 'warn'ing, or 'fail'. Binary "
+        "files and files larger than --max-file-size are always skipped "
+        "(default: %(default)s)"
+    )
+    parser.add_argument(
+        '-f', '--files-from',
+        metavar='FILE',
+        default=False,
+        action='store',
+        help="Read the PATHs to extract gettext from from FILE, one per "
+        "line, or from standard input if FILE is '-'"
+    )
+    parser.add_argument(
+        '-0', '--null',
+        action='store_true',
+        help='Paths in the --files-from FILE are separated by NUL '
+        'characters instead of newlines'
+    )
+    parser.add_argument(
+        '--include',
+        metavar='GLOB',
+        default=[],
+        action='append',
+        help='Only extract from files in directory PATHs with a name '
+        'matching GLOB, can be repeated'
+    )
+    parser.add_argument(
+        '--exclude',
+        metavar='GLOB',
+        default=[],
+        action='append',
+        help='Skip files and directories in directory PATHs with a name or '
+        'relative path matching GLOB, can be repeated'
+    )
+    parser.add_argument(
+        '--no-cache',
+        dest='cache',
+        action='store_false',
+        help='Scan every input PATH instead of reusing the results of '
+        'previous runs'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default='.lxgettext-cache',
+        action='store',
+        help='Directory for the extraction cache (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--cache-verify',
+        action='store_true',
+        help='Compare file contents instead of modification times to '
+        'decide whether cached results are up to date'
+    )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Print timings of every phase, throughput, the slowest files '
+        'and the peak memory use to stderr. Every file is read whole before '
+        'it is scanned, to time reading and scanning separately'
+    )
+    parser.add_argument(
+        '--stats-json',
+        metavar='FILE',
+        action='store',
+        help='Write the statistics of --stats to FILE as JSON'
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='FILE',
+        action='store',
+        help='Profile the run with cProfile and write the pstats to FILE. '
+        'With several jobs only the main process is profiled'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and update OUTPUT whenever the input PATHs '
+        'change, scanning only the changed files'
+    )
+    parser.add_argument(
+        '--watch-interval',
+        metavar='SECONDS',
+        default=1.0,
+        type=float,
+        action='store',
+        help='How often --watch looks for changes where inotify is not '
+        'available (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--watch-debounce',
+        metavar='SECONDS',
+        default=0.5,
+        type=float,
+        action='store',
+        help='Write OUTPUT once no files changed for SECONDS '
+        '(default: %(default)s)'
+    )
+    parser.add_argument(
+        '--watch-json',
+        metavar='FILE',
+        action='store',
+        help='With --watch, also write the translations to FILE like '
+        'lpo2json, {lang} is replaced with the language'
+    )
+    parser.add_argument(
+        '--since',
+        metavar='REF',
+        action='store',
+        help='Only scan the files that changed since the git revision REF '
+        '(committed or not) and keep the occurrences of the other files '
+        'listed in OUTPUT, which must be up to date with REF'
+    )
+    return parser
+
+
+def add_hook(event, callback):
+    """
+    Registers `callback` to be called on `event`, one of:
+    on_file_start(path) before a file is looked up in the cache or scanned,
+    on_file_done(path, matches, file_stats) after it, where `matches` is
+    None for skipped files and `file_stats` a FileStats with the timings or
+    None for cached files,
+    on_match(path, msgid, lineno) for every match and
+    on_save(result) with the MergeResult of every PO file updated.
+    The hooks are called by `update_po`, in the main process also with
+    several jobs.
+    """
+    if event not in hooks:
+        raise ValueError("Unknown hook event %r" % event)
+    hooks[event].append(callback)
+
+
+def remove_hook(event, callback):
+    """
+    Unregisters a `callback` registered with `add_hook`
+    """
+    hooks[event].remove(callback)
+
+
+def call_hooks(event, *args):
+    for callback in hooks[event]:
+        callback(*args)
+
+
+def get_args():
+    parser = get_parser()
     args = parser.parse_args()
+    if not args.path and not args.files_from:
+        parser.error("at least one PATH or --files-from is required")
+    if args.watch and not (args.output or args.locale_dir):
+        parser.error("--watch requires --output or --locale-dir")
+    if args.since:
+        from .git import is_revision
+
+        if not (args.output or args.locale_dir):
+            parser.error("--since requires --output or --locale-dir")
+        if args.add_location != 'full' or args.max_occurrences:
+            # the occurrences of the unchanged files are read from OUTPUT
+            parser.error("--since requires all the locations in OUTPUT, "
+                         "it can't be combined with --add-location=%s or "
+                         "--max-occurrences" % args.add_location)
+        if not is_revision(args.since):
+            parser.error("--since: %s is not a git revision" % args.since)
     return args
 
 
+@functools.lru_cache(maxsize=None)
+def get_defaults():
+    """
+    Returns a dict of the default value of every option of the parser
+    """
+    parser = get_parser()
+    defaults = {
+        action.dest: action.default
+        for action in parser._actions
+        if action.default is not argparse.SUPPRESS
+    }
+    defaults.update(parser._defaults)
+    return defaults
+
+
+def with_defaults(args):
+    """
+    Returns a copy of `args` with parser defaults for the missing options
+    """
+    options = argparse.Namespace(**get_defaults())
+    vars(options).update(vars(args))
+    return options
+
+
 def get_number_of_entries(path):
     """
-    Returns number of entries in the po file
+    Returns number of entries in the po file, counting the msgid lines
+    instead of parsing it
     """
     count = 0
-    if os.path.exists(path):
-        po = polib.pofile(path)
-        count = len(po)
+    if not os.path.exists(path):
+        return count
+    with io.open(path, 'r', encoding='utf8') as f:
+        lines = iter(f)
+        for line in lines:
+            if line.startswith('msgid ') or line.startswith('#~ msgid '):
+                # the header is an empty msgid directly followed by msgstr
+                if count == 0 and line.rstrip() == 'msgid ""':
+                    if next(lines, '').startswith('msgstr'):
+                        continue
+                count += 1
     return count
 
 
-def update_metadata(po, args):
+def get_now():
+    """
+    Returns the timestamp of this run, computed on first use
+    """
+    global now
+    if now is None:
+        import datetime
+        now = datetime.datetime.today().strftime("%Y-%m-%d %X%z")
+    return now
+
+
+def get_po_backend(name):
+    return importlib.import_module(PO_BACKENDS[name])
+
+
+def update_metadata(po, args, language=None):
     """
-    Update po file metadata
+    Update po file metadata, for `language` or else the one in `args`
     """
     metadata = {
         "Project-Id-Version": args.version,
         "Report-Msgid-Bugs-To": "support@surfly.com",
-        "POT-Creation-Date": now,
-        "PO-Revision-Date": now,
+        "POT-Creation-Date": get_now(),
+        "PO-Revision-Date": get_now(),
         "Last-Translator": "Admin <support@surfly.com>",
         "Language-Team": "LANGUAGE <support@surfly.com>",
-        "Language": args.language,
+        "Language": language or args.language,
         "MIME-Version": "1.0",
         "Content-Type": "text/plain; charset=utf-8",
         "Content-Transfer-Encoding": "8bit"
@@ -98,40 +643,692 @@ def update_metadata(po, args):
     po.metadata.update(metadata)
 
 
-def get_msgids(lines):
-    '''Generates (match, lineno) pairs.'''
+def has_literal(text, literals):
+    """
+    Returns whether `text` contains any of the strings in `literals`
+    """
+    for literal in literals:
+        if literal in text:
+            return True
+    return False
+
+
+def get_msgids(lines, pattern=gettext_re, key=None, literals=()):
+    '''Generates (match, lineno) pairs.
+    `key` returns the message of a match object, see `Patterns`. The pattern
+    is only run on the lines containing one of the strings in `literals`.'''
+    if key is None:
+        findall = pattern.findall
+        for i, line in enumerate(lines, start=1):
+            if literals and not has_literal(line, literals):
+                continue
+            for match in findall(line):
+                yield (match, i)
+        return
+    finditer = pattern.finditer
     for i, line in enumerate(lines, start=1):
-        for match in gettext_re.findall(line):
-            yield (match, i)
+        if literals and not has_literal(line, literals):
+            continue
+        for match in finditer(line):
+            yield (key(match), i)
 
 
-def update_po(paths, args):
+def read_path_list(path, null=False):
     """
-    Generates po file with messages to translate
-    Write data to po file
-    Create new po file if it does not exist
+    Generates the paths listed in the file at `path` ('-' for standard input)
+    as they are read, without loading the whole list
     """
+    separator = '\0' if null else '\n'
+    f = sys.stdin if path == '-' else io.open(path, 'r', encoding='utf8')
+    try:
+        tail = ''
+        for chunk in iter(lambda: f.read(1 << 16), ''):
+            items = (tail + chunk).split(separator)
+            tail = items.pop()
+            for item in items:
+                if item:
+                    yield item
+        if tail:
+            yield tail
+    finally:
+        if f is not sys.stdin:
+            f.close()
 
-    # msgid -> set( (path, lineno) )
-    matches = OrderedDict()
 
+def get_paths(args):
+    """
+    Returns an iterator over the PATH arguments followed by the paths in
+    the --files-from list
+    """
+    paths = iter(args.path)
+    if args.files_from:
+        paths = itertools.chain(
+            paths, read_path_list(args.files_from, args.null))
+    return paths
+
+
+def matches_any(name, patterns):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def walk(directory, include=(), exclude=(), prefix=""):
+    """
+    Generates the paths of the files below `directory` in name order,
+    filtered by the `include` and `exclude` glob patterns
+    """
+    with os.scandir(directory) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        relpath = prefix + entry.name
+        if matches_any(entry.name, exclude) or matches_any(relpath, exclude):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            for path in walk(entry.path, include, exclude, relpath + "/"):
+                yield path
+        elif entry.is_file():
+            if not include or matches_any(entry.name, include):
+                yield entry.path
+
+
+def iter_paths(paths, include=(), exclude=()):
+    """
+    Generates the files to extract from, directories in `paths` are walked
+    recursively
+    """
     for path in paths:
-        print("%s:" % path)
+        if os.path.isdir(path):
+            for subpath in walk(path, include, exclude):
+                yield subpath
+        else:
+            yield path
+
+
+def filter_paths(files, paths, include=(), exclude=()):
+    """
+    Generates the `files` that `iter_paths(paths, include, exclude)` would
+    generate, in the same form, without walking the directories. The files
+    do not need to exist.
+    """
+    for path in paths:
+        for name in files:
+            relpath = os.path.relpath(name, path)
+            if relpath == os.curdir:
+                yield path
+                continue
+            parts = relpath.split(os.sep)
+            if parts[0] == os.pardir:
+                continue
+            if any(
+                matches_any(part, exclude)
+                or matches_any("/".join(parts[:i + 1]), exclude)
+                for i, part in enumerate(parts)
+            ):
+                continue
+            if not include or matches_any(parts[-1], include):
+                yield os.path.join(path, *parts)
+
+
+def get_changed_paths(paths, args):
+    """
+    Returns (changed, deleted) lists of the files at `paths` that changed
+    since the git revision `args.since`, in the form `iter_paths` generates
+    them
+    """
+    from .git import get_changes
+
+    changed, deleted = get_changes(args.since)
+    paths = list(paths)
+    changed = OrderedDict.fromkeys(
+        filter_paths(changed, paths, args.include, args.exclude))
+    deleted = OrderedDict.fromkeys(
+        filter_paths(deleted, paths, args.include, args.exclude))
+    return (
+        [path for path in changed if os.path.isfile(path)],
+        [path for path in deleted if path not in changed],
+    )
+
+
+class LongLineError(Exception):
+    pass
+
+
+class ScanTimeout(Exception):
+    pass
+
+
+def check_deadline(deadline):
+    if deadline is not None and time.monotonic() > deadline:
+        raise ScanTimeout()
+
+
+def read_lines(f, max_line_length=0, deadline=None):
+    """
+    Generates the lines of the text file `f`, without ever reading more than
+    `max_line_length` characters of a line. Raises LongLineError for longer
+    lines and ScanTimeout once time.monotonic() passes the `deadline`.
+    """
+    if not max_line_length:
+        size = None
+    else:
+        size = max_line_length + 1
+        try:
+            # no line can be longer than the whole file
+            if os.fstat(f.fileno()).st_size <= max_line_length:
+                size = None
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+
+    if size is None and deadline is None:
+        for line in f:
+            yield line
+        return
+
+    while True:
+        line = f.readline(size or -1)
+        if not line:
+            return
+        if size and len(line) == size and not line.endswith('\n'):
+            raise LongLineError()
+        # lines are bounded with a deadline, so is the time to match one
+        check_deadline(deadline)
+        yield line
+
+
+def get_msgids_chunked(f, deadline=None, keywords=(KEYWORD,)):
+    """
+    Generates (match, "lineno:column") pairs for the text file `f`, reading
+    CHUNK_SIZE characters at a time. Matches are limited to MAX_MSGID_LENGTH
+    characters, so no more than that has to be kept between chunks.
+    """
+    patterns = get_patterns(keywords)
+    pattern = patterns.bounded
+    key = patterns.key or (lambda match: match.group(1))
+    # any match starting before the last `lookahead` characters of the
+    # buffer is complete
+    lookahead = patterns.length
+    buf = ''
+    lineno = 1
+    # offset of the start of the current line relative to `buf`
+    line_start = 0
+    eof = False
+    while not eof:
+        check_deadline(deadline)
+        chunk = f.read(CHUNK_SIZE)
+        eof = not chunk
+        buf += chunk
+        limit = len(buf) if eof else len(buf) - lookahead
+        if limit <= 0:
+            continue
+
+        counted = 0
+        keep = limit
+        matches = ()
+        if has_literal(buf, patterns.literals):
+            matches = pattern.finditer(buf)
+        for match in matches:
+            start = match.start()
+            if start >= limit:
+                break
+            newlines = buf.count('\n', counted, start)
+            if newlines:
+                lineno += newlines
+                line_start = buf.rindex('\n', counted, start) + 1
+            counted = start
+            keep = max(keep, match.end())
+            column = start - line_start + 1
+            yield (key(match), "%s:%s" % (lineno, column))
+
+        newlines = buf.count('\n', counted, keep)
+        if newlines:
+            lineno += newlines
+            line_start = buf.rindex('\n', counted, keep) + 1
+        line_start -= keep
+        buf = buf[keep:]
+
+
+def get_msgids_mmap(path, keywords=(KEYWORD,)):
+    """
+    Generates (match, lineno) pairs for the file at `path`, running the
+    bytes regex over the whole memory-mapped file. Only the matches are
+    decoded, line numbers are looked up in an index of newline offsets.
+    """
+    with io.open(path, 'rb') as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            return
+    with buf:
+        for item in get_msgids_buffer(buf, keywords):
+            yield item
+
+
+def get_msgids_buffer(buf, keywords=(KEYWORD,)):
+    """
+    Generates (match, lineno) pairs for the bytes-like `buf`, like
+    `get_msgids_mmap`
+    """
+    patterns = get_patterns(keywords)
+    key = patterns.key or (lambda match: match.group(1).decode('utf8'))
+    newlines = None
+    for match in patterns.bytes.finditer(buf):
+        if newlines is None:
+            newlines = [m.start() for m in re.finditer(b'\n', buf)]
+        lineno = bisect.bisect_left(newlines, match.start()) + 1
+        yield (key(match), lineno)
+
+
+class SkippedFile(Exception):
+    """
+    Raised by `sniff` and `read_file` for files that are not scanned, with
+    the reason
+    """
+
+
+def sniff(path, literals=(), max_file_size=0):
+    """
+    Returns whether the file at `path` contains any of the strings in
+    `literals`, searching its bytes without decoding them. Raises
+    SkippedFile if it is larger than `max_file_size` bytes (unless 0) or has
+    a NUL character in its first SNIFF_SIZE bytes.
+    """
+    with io.open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if max_file_size and size > max_file_size:
+            raise SkippedFile("larger than %s bytes" % max_file_size)
+        if not size:
+            # empty files can't be mapped
+            return False
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with buf:
+        return sniff_buffer(buf, literals)
+
+
+def sniff_buffer(buf, literals=()):
+    """
+    Returns whether the bytes-like `buf` contains any of the strings in
+    `literals`. Raises SkippedFile if it has a NUL character in its first
+    SNIFF_SIZE bytes.
+    """
+    if buf.find(b'\0', 0, SNIFF_SIZE) != -1:
+        raise SkippedFile("binary file")
+    return any(buf.find(literal.encode('utf8')) != -1
+               for literal in literals)
+
+
+def read_file(path, max_file_size=0):
+    """
+    Returns the bytes of the file at `path`. Raises SkippedFile if it is
+    larger than `max_file_size` bytes (unless 0).
+    """
+    with io.open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if max_file_size and size > max_file_size:
+            raise SkippedFile("larger than %s bytes" % max_file_size)
+        return f.read()
+
+
+def isolate(path, options, function, *args):
+    """
+    Returns function(*args) for the file at `path`, or None if it raises
+    SkippedFile or, unless `options.on_error` is 'fail', can't read or
+    decode the file. Skipped files are reported unless `options.on_error`
+    is 'skip'.
+    """
+    try:
+        return function(*args)
+    except SkippedFile as e:
+        reason = str(e)
+    except (OSError, UnicodeDecodeError) as e:
+        if options.on_error == 'fail':
+            raise
+        reason = str(e)
+    if options.on_error != 'skip':
+        sys.stderr.write("%s: skipped, %s\n" % (path, reason))
+    return None
+
+
+def read_source(path, options=DEFAULT_SCAN_OPTIONS):
+    """
+    Returns the text of the file at `path`, or None if it is skipped like
+    by `scan_file`
+    """
+    def read():
+        sniff(path, max_file_size=options.max_file_size)
         with io.open(path, 'r', encoding='utf8') as f:
-            for match, i in get_msgids(f):
+            return f.read()
+    return isolate(path, options, read)
+
+
+def scan_file(path, options=DEFAULT_SCAN_OPTIONS):
+    """
+    Returns (path, [(match, lineno), ...]) for the file at `path`, or
+    (path, None) if it was skipped: a binary file, larger than
+    `options.max_file_size`, taking too long to scan, or one that can't be
+    read or decoded, see `isolate`. Files without any of the keywords are
+    not decoded or scanned.
+    """
+    def scan():
+        if not sniff(path, get_patterns(options.keywords).literals,
+                     options.max_file_size):
+            return path, []
+        return scan_text(path, options)
+    return isolate(path, options, scan) or (path, None)
+
+
+def scan_text(path, options=DEFAULT_SCAN_OPTIONS, data=None):
+    """
+    Returns (path, [(match, lineno), ...]) for the text file at `path`.
+    Raises SkippedFile if scanning it timed out. The file is not read if
+    its bytes are given as `data`.
+    """
+    def open_text():
+        if data is None:
+            return io.open(path, 'r', encoding='utf8')
+        return io.TextIOWrapper(io.BytesIO(data), encoding='utf8')
+
+    scanner = options.scanner
+    max_line_length = options.max_line_length
+    deadline = None
+    if options.file_timeout:
+        deadline = time.monotonic() + options.file_timeout
+        # only the matches of the chunked scanner are bounded, an unclosed
+        # call on a long line could take longer than any timeout
+        if scanner == 'mmap':
+            scanner = 'chunked'
+        max_line_length = min(
+            max_line_length or MAX_MSGID_LENGTH, MAX_MSGID_LENGTH)
+    try:
+        if options.parser == 'tokenizer':
+            from .tokenizer import get_msgids_tokenized, is_markup
+            check = None
+            if deadline is not None:
+                check = functools.partial(check_deadline, deadline)
+            with open_text() as f:
+                msgids = get_msgids_tokenized(
+                    f.read(), options.keywords, is_markup(path), check)
+                return path, list(msgids)
+        if scanner == 'mmap':
+            if data is not None:
+                return path, list(get_msgids_buffer(data, options.keywords))
+            return path, list(get_msgids_mmap(path, options.keywords))
+
+        with open_text() as f:
+            if scanner == 'line':
                 try:
-                    matches[match].add((path, i))
-                except KeyError:
-                    matches[match] = set([(path, i)])
+                    lines = read_lines(f, max_line_length, deadline)
+                    patterns = get_patterns(options.keywords)
+                    return path, list(get_msgids(
+                        lines, patterns.text, patterns.key, patterns.literals))
+                except LongLineError:
+                    f.seek(0)
+            return path, list(
+                get_msgids_chunked(f, deadline, options.keywords))
+    except ScanTimeout:
+        raise SkippedFile("scanning took longer than %s seconds"
+                          % options.file_timeout)
+
+
+def scan_file_measured(path, options=DEFAULT_SCAN_OPTIONS):
+    """
+    Returns (path, matches, FileStats) like `scan_file`. The whole file is
+    read before it is scanned from memory, to time the reading separately.
+    """
+    from .stats import FileStats
+    start = time.perf_counter()
+    data = isolate(path, options, read_file, path, options.max_file_size)
+    read = time.perf_counter() - start
+    if data is None:
+        return path, None, FileStats(0, 0, read, 0)
+    lines = data.count(b'\n') + (0 if data.endswith(b'\n') else 1)
+
+    prefiltered = False
+
+    def scan():
+        nonlocal prefiltered
+        if not sniff_buffer(data, get_patterns(options.keywords).literals):
+            prefiltered = True
+            return path, []
+        return scan_text(path, options, data)
 
-    po = polib.pofile(args.output) if os.path.exists(args.output) \
-        else polib.POFile()
+    start = time.perf_counter()
+    path, matches = isolate(path, options, scan) or (path, None)
+    scan = time.perf_counter() - start
+    return path, matches, FileStats(
+        len(data), lines if data else 0, read, scan, prefiltered)
+
+
+def get_scan_options(args):
+    return ScanOptions(
+        parser=args.parser,
+        scanner=args.scanner,
+        max_line_length=args.max_line_length,
+        file_timeout=args.file_timeout,
+        keywords=tuple(args.keywords),
+        max_file_size=args.max_file_size,
+        on_error=args.on_error,
+    )
+
+
+def scan_paths(paths, jobs=1, cache=None, options=DEFAULT_SCAN_OPTIONS,
+               stats=None):
+    """
+    Generates (path, [(match, lineno), ...]) pairs in the order of `paths`,
+    with None instead of the list for files that were skipped.
+    Files are scanned in batches by a pool of `jobs` processes, 0 means one
+    process per core. Files with up to date results in `cache` are not
+    scanned again. Every file is recorded in the Stats `stats` and passed
+    to the on_file_start and on_file_done hooks.
+    """
+    import multiprocessing
+
+    measured = stats is not None or bool(hooks['on_file_done'])
+    scan = functools.partial(
+        scan_file_measured if measured else scan_file, options=options)
+    pool = multiprocessing.Pool(jobs or None) if jobs != 1 else None
+    batch_size = SCAN_CHUNKSIZE * (jobs or multiprocessing.cpu_count()) * 4
+    paths = iter(paths)
+    try:
+        while True:
+            batch = list(itertools.islice(paths, batch_size))
+            if not batch:
+                break
+
+            for path in batch:
+                call_hooks('on_file_start', path)
+            # files that can't be looked up are skipped like by `scan_file`
+            lookups = [
+                isolate(path, options, cache.lookup, path,
+                        options.max_file_size)
+                if cache is not None else (None, None)
+                for path in batch
+            ]
+            misses = [
+                path for path, lookup in zip(batch, lookups)
+                if lookup is not None and lookup[1] is None
+            ]
+            if pool is not None:
+                scanned = pool.imap(scan, misses, SCAN_CHUNKSIZE)
+            else:
+                scanned = map(scan, misses)
+
+            for path, lookup in zip(batch, lookups):
+                stamp, matches = lookup or (None, None)
+                file_stats = None
+                if lookup is not None and matches is None:
+                    result = next(scanned)
+                    matches = result[1]
+                    if measured:
+                        file_stats = result[2]
+                    if cache is not None and matches is not None:
+                        cache.store(path, stamp, matches)
+                if stats is not None:
+                    stats.add_file(path, file_stats,
+                                   None if matches is None else len(matches))
+                call_hooks('on_file_done', path, matches, file_stats)
+                yield path, matches
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+def get_cache_signature(args):
+    """
+    Returns a string summarising the options that affect what `scan_file`
+    extracts, used to invalidate cached results
+    """
+    return "%s:%r" % (gettext_re.pattern, tuple(get_scan_options(args)))
+
+
+def get_targets(args):
+    """
+    Returns [(language, path), ...] for the PO files to update: the OUTPUT,
+    or one file per language in the locale directory
+    """
+    if not args.locale_dir:
+        return [(args.language, args.output)]
+
+    def get_path(language):
+        return os.path.join(
+            args.locale_dir, args.path_template.format(lang=language))
+
+    if args.languages:
+        languages = args.languages.split(',')
+    else:
+        languages = sorted(
+            name for name in os.listdir(args.locale_dir)
+            if os.path.isfile(get_path(name))
+        )
+    return [(language, get_path(language)) for language in languages]
+
+
+def extract_matches(paths, args, cache=None, stats=None, skipped=None):
+    """
+    Returns the Occurrences of every msgid found in the files at `paths`.
+    The paths of the files that were skipped are appended to the list
+    `skipped`.
+    """
+    matches = Occurrences()
+
+    paths = iter_paths(paths, args.include, args.exclude)
+    if stats is not None:
+        paths = stats.timed('discovery', paths)
+    options = get_scan_options(args)
+    for path, msgids in scan_paths(paths, args.jobs, cache, options, stats):
+        if hooks['on_match']:
+            for match, i in msgids or ():
+                call_hooks('on_match', path, match, i)
+        if msgids:
+            matches.add_file(path, msgids)
+        elif msgids is None and skipped is not None:
+            skipped.append(path)
+
+    if cache is not None:
+        cache.save()
+
+    return matches
+
+
+def occurrence_key(occurrence):
+    """
+    Sort key for (path, lineno) occurrences, where lineno is a line number
+    or a "lineno:column" string, see `parse_lineno`
+    """
+    path, lineno = occurrence
+    return path, parse_lineno(lineno)
+
+
+def read_occurrence(path, lineno):
+    """
+    Returns the (path, lineno) occurrence as written by lxgettext for one
+    read back from a PO file, whose parsers split "path:line:column" into
+    ("path:line", "column")
+    """
+    head, sep, line = path.rpartition(':')
+    if sep and line.isdigit() and str(lineno).isdigit():
+        return head, "%s:%s" % (line, lineno)
+    return path, lineno
+
+
+def get_locations(occurrences, add_location='full', max_occurrences=0):
+    """
+    Returns the occurrences to write for the sorted (path, lineno)
+    `occurrences` of an entry: all of them, once per path with an empty
+    lineno for add_location='file', or none for 'never'. Only the first
+    `max_occurrences` are kept unless it is 0.
+    """
+    if add_location == 'never':
+        return []
+    if add_location == 'file':
+        occurrences = [
+            (path, '') for path in
+            OrderedDict.fromkeys(path for path, _ in occurrences)
+        ]
+    if max_occurrences:
+        occurrences = occurrences[:max_occurrences]
+    return occurrences
+
+
+def catalog_changed(contents, path):
+    """
+    Returns whether the PO file `contents` differ from the file at `path` in
+    more than the timestamp headers
+    """
+    if not os.path.exists(path):
+        return True
+    with io.open(path, 'r', encoding='utf8') as f:
+        old_contents = f.read()
+    return (TIMESTAMP_HEADER_RE.sub('', contents)
+            != TIMESTAMP_HEADER_RE.sub('', old_contents))
+
+
+def load_po(output, args):
+    """
+    Returns (POFile, number of entries) for the PO file at `output`, an
+    empty POFile if it does not exist or is a template
+    """
+    backend = get_po_backend(args.po_backend)
+    if args.pot:
+        # templates are written from scratch
+        return backend.POFile(), get_number_of_entries(output)
+    elif os.path.exists(output):
+        po = backend.pofile(output)
+        return po, len(po)
+    return backend.POFile(), 0
+
+
+def merge_po(matches, target, args, po=None):
+    """
+    Write the extracted Occurrences `matches` to the PO file of the
+    (language, path) `target`, creating it if it does not exist. `po` is
+    the POFile of the target if it is already loaded, it is updated in
+    place.
+    Returns a MergeResult. With `skip_unchanged` or `exit_code`, files that
+    would only get new timestamps are left untouched.
+    """
+    language, output = target
+    backend = get_po_backend(args.po_backend)
+    timings = {}
+    start = time.perf_counter()
+    if po is None:
+        po, entries_before = load_po(output, args)
+    else:
+        entries_before = len(po)
+    if args.pot:
+        # templates have no language
+        language = ""
+    timings['po_load'] = time.perf_counter() - start
+    start = time.perf_counter()
 
     # remove old occurrences
     for entry in po:
         del entry.occurrences[:]
 
-    entries = {entry.msgid: entry for entry in po}
+    # entries are identified by their msgid and context, a plural found for
+    # them is added to the entry
+    entries = {join_msgid(entry.msgid, msgctxt=entry.msgctxt): entry
+               for entry in po}
 
     # remove all POEntries from the old PO file so we can start from scratch.
     # entries (and possible translations) are retained in the entries dict.
@@ -139,42 +1336,172 @@ def update_po(paths, args):
         del po[:]
 
     new_entries = 0
+    # key -> all the occurrences of the entries already updated by this run
+    seen = {}
     for match, occurrences in matches.items():
+        msgctxt, msgid, msgid_plural = split_msgid(match)
+        key = join_msgid(msgid, msgctxt=msgctxt)
 
         # if the string was already listed in the POFile, keep the POEntry in
         # the POFile
         try:
-            entry = entries[match]
-            if args.prune:
+            entry = entries[key]
+            if args.prune and key not in seen:
                 po.append(entry)
 
         # if we've encountered a new string, add that to the POFile
         except KeyError:
             new_entries += 1
-            entry = polib.POEntry(msgid=match, msgstr="")
-            entries[match] = entry
+            entry = backend.POEntry(msgid=msgid, msgctxt=msgctxt, msgstr="")
+            entries[key] = entry
             po.append(entry)
 
-        entry.occurrences = list(occurrences)
+        if msgid_plural and entry.msgid_plural != msgid_plural:
+            entry.msgid_plural = msgid_plural
+            if not entry.msgstr_plural:
+                entry.msgstr_plural = {0: entry.msgstr, 1: ""}
+                entry.msgstr = ""
+
+        if key in seen:
+            occurrences = sorted(set(occurrences).union(seen[key]),
+                                 key=occurrence_key)
+        seen[key] = occurrences
+        entry.occurrences = get_locations(
+            occurrences, args.add_location, args.max_occurrences)
+
+    if args.sort_output:
+        po.sort(key=lambda entry: entry.msgid)
+    elif args.sort_by_file:
+        # also by the locations that are not written
+        def first_occurrence(entry):
+            occurrences = seen.get(
+                join_msgid(entry.msgid, msgctxt=entry.msgctxt), ())
+            return (
+                not occurrences,
+                [occurrence_key(occurrence) for occurrence in occurrences[:1]],
+            )
+        po.sort(key=first_occurrence)
+
+    update_metadata(po, args, language)
+    if args.pot:
+        po.metadata["Language"] = ""
+    directory = os.path.dirname(output)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    timings['merge'] = time.perf_counter() - start
+    start = time.perf_counter()
+    result = MergeResult(
+        output, new_entries, entries_before, len(po), True, timings,
+        len(matches))
+    if not (args.skip_unchanged or args.exit_code):
+        po.save(output)
+    else:
+        contents = po.__unicode__()
+        if not catalog_changed(contents, output):
+            result = result._replace(changed=False)
+        else:
+            with io.open(output, 'w', encoding=po.encoding) as f:
+                f.write(contents)
+    timings['save'] = time.perf_counter() - start
+    return result
+
+
+def merge_po_since(matches, target, args, stale=()):
+    """
+    Like `merge_po`, for `matches` extracted from the changed files only:
+    the occurrences of the other files are kept from the PO file of the
+    (language, path) `target`, the ones of the `stale` paths are removed.
+    """
+    output = target[1]
+    start = time.perf_counter()
+    po = get_po_backend(args.po_backend).pofile(output)
+    load = time.perf_counter() - start
+
+    merged = Occurrences()
+    for entry in po:
+        match = join_msgid(
+            entry.msgid, entry.msgid_plural or None, entry.msgctxt)
+        for occurrence in entry.occurrences:
+            path, lineno = read_occurrence(*occurrence)
+            if path not in stale:
+                merged.add(match, path, lineno)
+    merged.update(matches)
 
-    update_metadata(po, args)
-    po.save(args.output)
-    result = "  %s new, %s total" % (new_entries, len(matches))
-    if new_entries > 0:
-        result = COLOUR_GREEN + result + COLOUR_END
-    print(result)
+    # templates are written from scratch
+    result = merge_po(merged, target, args, None if args.pot else po)
+    result.timings['po_load'] += load
+    return result
 
 
-def generate_po(data, filename):
+def update_po(paths, args, cache=None, stats=None, skipped=None):
     """
     Generates po file with messages to translate
+    Write data to po file
+    Create new po file if it does not exist
+    Reuse and update the results stored in the ExtractionCache `cache`
+    The sources are scanned once for all the target PO files, which are
+    updated by `args.jobs` processes.
+    With `args.since`, only the files changed since that git revision are
+    scanned, unless a PO file does not exist yet.
+    Timings and counters are recorded in the Stats `stats`, the paths of
+    skipped files are appended to the list `skipped`.
+    Returns a MergeResult for every PO file.
     """
+    args = with_defaults(args)
+    targets = get_targets(args)
+    merge = merge_po
+    if args.since and all(os.path.exists(output) for _, output in targets):
+        start = time.perf_counter()
+        paths, deleted = get_changed_paths(paths, args)
+        if stats is not None:
+            stats.phases['discovery'] += time.perf_counter() - start
+        merge = functools.partial(
+            merge_po_since, stale=frozenset(paths + deleted))
+    matches = extract_matches(paths, args, cache, stats, skipped)
 
-    data = data.split('\n')
+    merge = functools.partial(merge, matches, args=args)
+    # the same timestamp for all PO files, also when written by workers
+    get_now()
+    pool = None
+    if len(targets) > 1 and args.jobs != 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(
+            min(args.jobs or len(targets), len(targets)))
+    try:
+        results = pool.imap(merge, targets) if pool else map(merge, targets)
+        results = list(results)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    for result in results:
+        if stats is not None:
+            stats.add_timings(result.timings)
+        call_hooks('on_save', result)
+    return results
+
+
+def generate_po(data, filename, options=DEFAULT_SCAN_OPTIONS,
+                add_location='full', max_occurrences=0):
+    """
+    Generates po file with messages to translate, with the occurrences
+    selected by `add_location` and `max_occurrences` like `get_locations`
+    """
+
+    if options.parser == 'tokenizer':
+        from .tokenizer import get_msgids_tokenized, is_markup
+        msgids = get_msgids_tokenized(
+            data, options.keywords, is_markup(filename))
+    else:
+        patterns = get_patterns(options.keywords)
+        msgids = get_msgids(
+            data.split('\n'), patterns.text, patterns.key, patterns.literals)
 
     # collect matches by msgid
     matches = OrderedDict()
-    for msgid, i in get_msgids(data):
+    for msgid, i in msgids:
         try:
             matches[msgid].add(i)
         except KeyError:
@@ -182,28 +1509,124 @@ def generate_po(data, filename):
 
     # Show captured data
     return "\n".join(
-        INFO_TEMPLATE.format(
-            msgid=msgid,
-            occurrence=", ".join("%s:%s" % (filename, i) for i in linenos),
-        )
-        for msgid, linenos in matches.items()
+        format_info(match, ", ".join(
+            "%s:%s" % (path, i) if i else path
+            for path, i in get_locations(
+                [(filename, i) for i in sorted(linenos)],
+                add_location, max_occurrences)
+        ))
+        for match, linenos in matches.items()
     )
 
 
+def format_info(match, occurrence):
+    """
+    Returns the PO entry of the message `match` for `generate_po`, without
+    a `#:` line if `occurrence` is empty
+    """
+    msgctxt, msgid, msgid_plural = split_msgid(match)
+    info = INFO_TEMPLATE.format(msgid=msgid, occurrence=occurrence)
+    header, _, rest = info.partition('\n')
+    if msgctxt is not None:
+        rest = CONTEXT_TEMPLATE.format(msgctxt=msgctxt) + rest
+    info = header + '\n' + rest if occurrence else rest
+    if msgid_plural:
+        # in place of the msgstr line that ends the template
+        info = info[:info.rindex('msgstr')] + PLURAL_TEMPLATE.format(
+            msgid_plural=msgid_plural)
+    return info
+
+
 def main():
     args = get_args()
-    entries_before = get_number_of_entries(args.output)
-    if args.output:
-        update_po(args.path, args)
+    if not args.profile:
+        return run(args)
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(run, args)
+    finally:
+        profiler.dump_stats(args.profile)
+
+
+def run(args):
+    stats = None
+    if args.stats or args.stats_json:
+        from .stats import FileStats, Stats
+        stats = Stats()
+    results = []
+    # paths of the files that were not scanned
+    skipped = []
+    if args.output or args.locale_dir:
+        cache = None
+        if args.cache:
+            cache = ExtractionCache(
+                args.cache_dir,
+                get_cache_signature(args),
+                verify=args.cache_verify,
+            )
+        if args.watch:
+            from .watch import watch
+            return watch(get_paths(args), args, cache)
+
+        def print_path(path):
+            print("%s:" % path)
+
+        add_hook('on_file_start', print_path)
+        try:
+            results = update_po(get_paths(args), args, cache, stats, skipped)
+        finally:
+            remove_hook('on_file_start', print_path)
     else:
-        for item in args.path:
-            with io.open(item, "r", encoding="utf8") as f:
-                print(generate_po(f.read(), item))
-    entries_after = get_number_of_entries(args.output)
-    message = "Entries: %s / %s" % (entries_before, entries_after)
-    if entries_after > entries_before:
-        message = COLOUR_GREEN + message + COLOUR_END
-    print(message)
+        paths = iter_paths(get_paths(args), args.include, args.exclude)
+        if stats is not None:
+            paths = stats.timed('discovery', paths)
+        options = get_scan_options(args)
+        for item in paths:
+            start = time.perf_counter()
+            data = read_source(item, options)
+            read = time.perf_counter() - start
+            if data is None:
+                skipped.append(item)
+                if stats is not None:
+                    stats.add_file(item, FileStats(0, 0, read, 0), None)
+                continue
+            po = generate_po(data, item, options,
+                             args.add_location, args.max_occurrences)
+            if stats is not None:
+                stats.add_file(item, FileStats(
+                    len(data.encode('utf8')), data.count('\n') + 1, read,
+                    time.perf_counter() - start - read,
+                ), ('\n' + po).count('\nmsgid "'))
+            print(po)
+    for result in results:
+        message = "  %s new, %s total" % (result.new_entries, result.extracted)
+        if not result.changed:
+            message += ", unchanged"
+        if len(results) > 1:
+            message = "%s:%s" % (result.path, message)
+        if result.new_entries > 0:
+            message = COLOUR_GREEN + message + COLOUR_END
+        print(message)
+    for result in results:
+        message = "Entries: %s / %s" % (
+            result.entries_before, result.entries_after)
+        if len(results) > 1:
+            message = "%s: %s" % (result.path, message)
+        if result.entries_after > result.entries_before:
+            message = COLOUR_GREEN + message + COLOUR_END
+        print(message)
+    if skipped:
+        sys.stderr.write("%s file%s skipped\n" % (
+            len(skipped), "" if len(skipped) == 1 else "s"))
+    if stats is not None:
+        if args.stats:
+            sys.stderr.write("\n".join(stats.report()) + "\n")
+        if args.stats_json:
+            stats.save(args.stats_json)
+    if args.exit_code and any(result.changed for result in results):
+        sys.exit(EXIT_CHANGED)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,129 @@
+import argparse
+import functools
+
+from .lxgettext import (
+    PO_BACKENDS, get_po_backend, iter_paths, non_negative_int, valid_path,
+)
+
+COLOUR_GREEN = '\033[92m'
+COLOUR_END = '\033[0m'
+
+# template and PO backend shared by the worker processes, see
+# `load_template`
+template = backend = None
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        "Update PO files against a template (POT) created with "
+        "`lxgettext --pot`"
+    )
+    parser.add_argument(
+        "template",
+        metavar="TEMPLATE",
+        type=valid_path,
+        action='store',
+        help='Path to the *pot file'
+    )
+    parser.add_argument(
+        "path",
+        metavar="PATH",
+        nargs="+",
+        type=valid_path,
+        action='store',
+        help='Path to the *po file to update, directories are searched '
+        'recursively for *po files'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        default=0,
+        type=non_negative_int,
+        action='store',
+        help='Number of processes updating PO files, 0 to use all available '
+        'cores (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--po-backend',
+        default='native',
+        choices=PO_BACKENDS,
+        help="Library reading and writing PO files: the built-in 'native' "
+        "one or 'polib' (default: %(default)s)"
+    )
+    args = parser.parse_args()
+    return args
+
+
+def load_template(path, po_backend='native'):
+    global template, backend
+    backend = get_po_backend(po_backend)
+    template = backend.pofile(path)
+
+
+def merge_pofile(path):
+    """
+    Merge the loaded template into the PO file at `path`: translations are
+    kept, occurrences are taken from the template, new strings are added and
+    strings that are no longer in the template are marked obsolete.
+    Returns (path, new entries, obsoleted entries).
+    """
+    po = backend.pofile(path)
+    obsolete = {entry.msgid_with_context: entry.obsolete for entry in po}
+
+    po.merge(template)
+
+    new_entries = sum(
+        1 for entry in template if entry.msgid_with_context not in obsolete)
+    obsoleted = 0
+    for entry in po:
+        if entry.obsolete:
+            del entry.occurrences[:]
+            if not obsolete.get(entry.msgid_with_context, True):
+                obsoleted += 1
+
+    creation_date = template.metadata.get("POT-Creation-Date")
+    if creation_date:
+        po.metadata["POT-Creation-Date"] = creation_date
+    po.save(path)
+    return path, new_entries, obsoleted
+
+
+def merge_pofiles(template_path, paths, jobs=0, po_backend='native'):
+    """
+    Generates (path, new entries, obsoleted entries) for every PO file in
+    `paths` merged with the template at `template_path` by `jobs` processes,
+    reading and writing them with the PO backend `po_backend`
+    """
+    if jobs == 1:
+        load_template(template_path, po_backend)
+        for path in paths:
+            yield merge_pofile(path)
+        return
+
+    import multiprocessing
+
+    pool = multiprocessing.Pool(
+        jobs or None,
+        initializer=functools.partial(
+            load_template, template_path, po_backend),
+    )
+    try:
+        for result in pool.imap(merge_pofile, paths):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main():
+    args = get_args()
+    paths = iter_paths(args.path, include=['*.po'])
+    for path, new_entries, obsoleted in merge_pofiles(
+            args.template, paths, args.jobs, args.po_backend):
+        result = "%s: %s new, %s obsolete" % (path, new_entries, obsoleted)
+        if new_entries > 0:
+            result = COLOUR_GREEN + result + COLOUR_END
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
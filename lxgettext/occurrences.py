@@ -0,0 +1,144 @@
+"""
+Compact storage of the occurrences of the extracted messages.
+
+Every path is stored once in a table, and the occurrences of a msgid are a
+flat array of (path id, line, column) integers, 12 bytes per occurrence
+instead of a tuple and a set slot. They are turned into sorted (path, lineno)
+tuples without duplicates only when a PO entry is written.
+"""
+
+from array import array
+from collections import OrderedDict
+
+# typecode of the occurrence arrays: unsigned 32 bit integers
+TYPECODE = 'I'
+
+
+def parse_lineno(lineno):
+    """
+    Returns (line, column) of a line number or a "lineno:column" string,
+    with column 0 if there is none. Occurrences without a line number, like
+    the ones of PO files written with --add-location=file, or with one that
+    isn't a number get (0, 0).
+    """
+    if isinstance(lineno, int):
+        return lineno, 0
+    line, _, column = str(lineno).partition(':')
+    if not line.isdigit():
+        return 0, 0
+    return int(line), int(column) if column.isdigit() else 0
+
+
+def format_lineno(line, column):
+    """
+    Returns the line number, the "lineno:column" string with a column, or
+    '' for line 0
+    """
+    if column:
+        return "%d:%d" % (line, column)
+    return line or ''
+
+
+class Occurrences(object):
+    """
+    Maps every msgid to the (path, lineno) pairs where it was found, in the
+    order the msgids were first added. Replaces the OrderedDict of sets of
+    (path, lineno) tuples `update_po` used to build.
+    """
+
+    def __init__(self):
+        # path id -> path
+        self.paths = []
+        # path -> path id
+        self.path_ids = {}
+        # msgid -> array of path id, line, column triples
+        self.messages = OrderedDict()
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __contains__(self, msgid):
+        return msgid in self.messages
+
+    def get_path_id(self, path):
+        try:
+            return self.path_ids[path]
+        except KeyError:
+            path_id = self.path_ids[path] = len(self.paths)
+            self.paths.append(path)
+            return path_id
+
+    def add(self, msgid, path, lineno):
+        self.add_file(path, ((msgid, lineno),))
+
+    def add_file(self, path, matches):
+        """
+        Adds the (msgid, lineno) pairs `matches` found in the file at `path`
+        """
+        path_id = self.get_path_id(path)
+        messages = self.messages
+        for msgid, lineno in matches:
+            line, column = parse_lineno(lineno)
+            try:
+                messages[msgid].extend((path_id, line, column))
+            except KeyError:
+                messages[msgid] = array(TYPECODE, (path_id, line, column))
+
+    def remove_file(self, path, msgids):
+        """
+        Removes the occurrences of the `msgids` in the file at `path`, and
+        the msgids that are left without occurrences
+        """
+        path_id = self.path_ids.get(path)
+        if path_id is None:
+            return
+        for msgid in set(msgids):
+            items = self.messages.get(msgid)
+            if items is None:
+                continue
+            kept = array(TYPECODE)
+            for i in range(0, len(items), 3):
+                if items[i] != path_id:
+                    kept.extend(items[i:i + 3])
+            if kept:
+                self.messages[msgid] = kept
+            else:
+                del self.messages[msgid]
+
+    def update(self, other):
+        """
+        Adds the occurrences of the Occurrences `other`
+        """
+        path_ids = [self.get_path_id(path) for path in other.paths]
+        messages = self.messages
+        for msgid, items in other.messages.items():
+            items = array(TYPECODE, items)
+            for i in range(0, len(items), 3):
+                items[i] = path_ids[items[i]]
+            try:
+                messages[msgid].extend(items)
+            except KeyError:
+                messages[msgid] = items
+
+    def get(self, msgid):
+        """
+        Returns the sorted list of (path, lineno) occurrences of `msgid`
+        """
+        items = self.messages[msgid]
+        paths = self.paths
+        triples = set(zip(items[0::3], items[1::3], items[2::3]))
+        return [
+            (paths[path_id], format_lineno(line, column))
+            for path_id, line, column in sorted(
+                triples, key=lambda triple: (paths[triple[0]],) + triple[1:])
+        ]
+
+    def items(self):
+        """
+        Generates (msgid, sorted list of (path, lineno)) pairs
+        """
+        for msgid in self.messages:
+            yield msgid, self.get(msgid)
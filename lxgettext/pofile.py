@@ -0,0 +1,615 @@
+"""
+Streaming PO file reader and writer.
+
+A drop-in replacement for the subset of polib used by lxgettext and the
+scripts: `pofile()` parses a file in a single pass over the lines read from
+it into compact POEntry objects, the header metadata is only parsed when it
+is first accessed, and `POFile.save()` writes the same output as polib,
+including its line wrapping, one line at a time. Neither holds the whole
+file in memory.
+"""
+
+import codecs
+import io
+import mmap
+import os
+import re
+import textwrap
+
+default_encoding = 'utf-8'
+
+charset_re = re.compile(br'"Content-Type: [^;]+;\s*charset=([^\\"\s]+)')
+unescape_re = re.compile(r'\\(\\|n|t|r|v|b|f|")')
+special_re = re.compile(r'[\\\t\r\n\v\b\f"]')
+quote_re = re.compile(r'(?:[^\\]|^)"')
+
+UNESCAPES = {
+    'n': '\n', 't': '\t', 'r': '\r', 'v': '\v', 'b': '\b', 'f': '\f',
+    '\\': '\\', '"': '"',
+}
+
+# header fields written first, in this order, like polib does
+METADATA_ORDER = (
+    'Project-Id-Version',
+    'Report-Msgid-Bugs-To',
+    'POT-Creation-Date',
+    'PO-Revision-Date',
+    'Last-Translator',
+    'Language-Team',
+    'Language',
+    'MIME-Version',
+    'Content-Type',
+    'Content-Transfer-Encoding',
+    'Plural-Forms',
+)
+
+PREVIOUS_FIELDS = {
+    'msgctxt': 'previous_msgctxt',
+    'msgid': 'previous_msgid',
+    'msgid_plural': 'previous_msgid_plural',
+}
+
+SPECIAL_CHARS = ('\\', '\n', '\r', '\t', '\v', '\b', '\f', '"')
+
+
+def escape(st):
+    """
+    Escapes backslashes, control characters and double quotes in `st`
+    """
+    if not special_re.search(st):
+        return st
+    return st.replace('\\', r'\\')\
+             .replace('\t', r'\t')\
+             .replace('\r', r'\r')\
+             .replace('\n', r'\n')\
+             .replace('\v', r'\v')\
+             .replace('\b', r'\b')\
+             .replace('\f', r'\f')\
+             .replace('"', r'\"')
+
+
+def unescape(st):
+    """
+    Reverts `escape`
+    """
+    if '\\' not in st:
+        return st
+    return unescape_re.sub(lambda match: UNESCAPES[match.group(1)], st)
+
+
+def natural_key(key):
+    return [int(part) if part.isdigit() else part.lower()
+            for part in re.split('([0-9]+)', key)]
+
+
+def str_field(fieldname, prefix, plural_index, field, wrapwidth):
+    """
+    Returns the lines of a `fieldname "field"` statement, wrapped like polib
+    """
+    lines = field.splitlines(True)
+    if len(lines) > 1:
+        lines = [''] + lines
+    else:
+        length = len(fieldname) + 3 + len(plural_index)
+        if wrapwidth > 0 and len(field) > wrapwidth - length:
+            specials = sum(field.count(c) for c in SPECIAL_CHARS)
+            if len(field) > wrapwidth - length + specials:
+                lines = [''] + [unescape(item) for item in textwrap.wrap(
+                    escape(field),
+                    wrapwidth - 2,
+                    drop_whitespace=False,
+                    break_long_words=False
+                )]
+            else:
+                lines = [field]
+        else:
+            lines = [field]
+    if fieldname.startswith('previous_'):
+        fieldname = fieldname[9:]
+
+    ret = ['%s%s%s "%s"' % (prefix, fieldname, plural_index,
+                            escape(lines[0]))]
+    for line in lines[1:]:
+        ret.append('%s"%s"' % (prefix, escape(line)))
+    return ret
+
+
+def wrap_comment(text, prefix, wrapwidth):
+    if wrapwidth > 0 and len(text) + len(prefix) > wrapwidth:
+        return textwrap.wrap(
+            text,
+            wrapwidth,
+            initial_indent=prefix,
+            subsequent_indent=prefix,
+            break_long_words=False
+        )
+    return ['%s%s' % (prefix, text)]
+
+
+class POEntry(object):
+    """
+    A PO file entry, with the attributes and keyword arguments of
+    polib.POEntry
+    """
+
+    __slots__ = (
+        'msgid', 'msgstr', 'msgid_plural', 'msgstr_plural', 'msgctxt',
+        'obsolete', 'encoding', 'comment', 'tcomment', 'occurrences', 'flags',
+        'previous_msgctxt', 'previous_msgid', 'previous_msgid_plural',
+        'linenum',
+    )
+
+    def __init__(self, msgid='', msgstr='', msgid_plural='',
+                 msgstr_plural=None, msgctxt=None, obsolete=False,
+                 encoding=default_encoding, comment='', tcomment='',
+                 occurrences=None, flags=None, previous_msgctxt=None,
+                 previous_msgid=None, previous_msgid_plural=None,
+                 linenum=None):
+        self.msgid = msgid
+        self.msgstr = msgstr
+        self.msgid_plural = msgid_plural
+        self.msgstr_plural = msgstr_plural if msgstr_plural is not None \
+            else {}
+        self.msgctxt = msgctxt
+        self.obsolete = obsolete
+        self.encoding = encoding
+        self.comment = comment
+        self.tcomment = tcomment
+        self.occurrences = occurrences if occurrences is not None else []
+        self.flags = flags if flags is not None else []
+        self.previous_msgctxt = previous_msgctxt
+        self.previous_msgid = previous_msgid
+        self.previous_msgid_plural = previous_msgid_plural
+        self.linenum = linenum
+
+    @property
+    def msgid_with_context(self):
+        if self.msgctxt:
+            return '%s%s%s' % (self.msgctxt, "\x04", self.msgid)
+        return self.msgid
+
+    @property
+    def fuzzy(self):
+        return 'fuzzy' in self.flags
+
+    @fuzzy.setter
+    def fuzzy(self, value):
+        if value and not self.fuzzy:
+            self.flags.insert(0, 'fuzzy')
+        elif not value and self.fuzzy:
+            self.flags.remove('fuzzy')
+
+    def translated(self):
+        if self.obsolete or self.fuzzy:
+            return False
+        if self.msgstr != '':
+            return True
+        if self.msgstr_plural:
+            return all(self.msgstr_plural.values())
+        return False
+
+    def merge(self, other):
+        """
+        Merge the template entry `other` into this one, like polib does
+        """
+        fuzzy = self.fuzzy
+        self.msgid = other.msgid
+        self.msgctxt = other.msgctxt
+        self.occurrences = other.occurrences
+        self.comment = other.comment
+        self.flags = other.flags[:]
+        if fuzzy:
+            self.flags.append('fuzzy')
+        self.msgid_plural = other.msgid_plural
+        self.obsolete = other.obsolete
+        self.previous_msgctxt = other.previous_msgctxt
+        self.previous_msgid = other.previous_msgid
+        self.previous_msgid_plural = other.previous_msgid_plural
+        for index in other.msgstr_plural:
+            self.msgstr_plural.setdefault(index, '')
+
+    def lines(self, wrapwidth=78):
+        """
+        Returns the lines of the entry, without trailing newlines
+        """
+        ret = []
+        if self.tcomment:
+            for comment in self.tcomment.split('\n'):
+                ret += wrap_comment(comment, '# ', wrapwidth)
+        if self.comment and not self.obsolete:
+            for comment in self.comment.split('\n'):
+                ret += wrap_comment(comment, '#. ', wrapwidth)
+
+        if self.occurrences and not self.obsolete:
+            filestr = ' '.join(
+                '%s:%s' % (fpath, lineno) if lineno else fpath
+                for fpath, lineno in self.occurrences
+            )
+            if wrapwidth > 0 and len(filestr) + 3 > wrapwidth:
+                # keep textwrap from breaking paths at hyphens
+                ret += [line.replace('*', '-') for line in textwrap.wrap(
+                    filestr.replace('-', '*'),
+                    wrapwidth,
+                    initial_indent='#: ',
+                    subsequent_indent='#: ',
+                    break_long_words=False
+                )]
+            else:
+                ret.append('#: ' + filestr)
+
+        if self.flags:
+            ret.append('#, %s' % ', '.join(self.flags))
+
+        prefix = '#~| ' if self.obsolete else '#| '
+        for field in ('previous_msgctxt', 'previous_msgid',
+                      'previous_msgid_plural'):
+            value = getattr(self, field)
+            if value is not None:
+                ret += str_field(field, prefix, '', value, wrapwidth)
+
+        prefix = '#~ ' if self.obsolete else ''
+        if self.msgctxt is not None:
+            ret += str_field('msgctxt', prefix, '', self.msgctxt, wrapwidth)
+        ret += str_field('msgid', prefix, '', self.msgid, wrapwidth)
+        if self.msgid_plural:
+            ret += str_field(
+                'msgid_plural', prefix, '', self.msgid_plural, wrapwidth)
+        if self.msgstr_plural:
+            for index in sorted(self.msgstr_plural):
+                ret += str_field('msgstr', prefix, '[%s]' % index,
+                                 self.msgstr_plural[index], wrapwidth)
+        else:
+            ret += str_field('msgstr', prefix, '', self.msgstr, wrapwidth)
+        return ret
+
+    def __unicode__(self, wrapwidth=78):
+        return '\n'.join(self.lines(wrapwidth)) + '\n'
+
+    __str__ = __unicode__
+
+    def __repr__(self):
+        return '<POEntry %r>' % self.msgid
+
+
+class POFile(list):
+    """
+    A list of POEntry objects with the header of the PO file, with the
+    attributes and methods of polib.POFile used by lxgettext
+    """
+
+    def __init__(self, fpath=None, wrapwidth=78, encoding=default_encoding,
+                 **kwargs):
+        list.__init__(self)
+        self.fpath = fpath
+        self.wrapwidth = wrapwidth
+        self.encoding = encoding
+        self.header = ''
+        self.metadata_is_fuzzy = []
+        self._metadata = {}
+        # msgstr of the header entry, parsed into `metadata` on first use
+        self._header_msgstr = None
+
+    @property
+    def metadata(self):
+        if self._header_msgstr is not None:
+            key = None
+            for line in self._header_msgstr.splitlines():
+                try:
+                    key, value = line.split(':', 1)
+                    self._metadata[key] = value.strip()
+                except ValueError:
+                    if key is not None:
+                        self._metadata[key] += '\n' + line.strip()
+            self._header_msgstr = None
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value):
+        self._header_msgstr = None
+        self._metadata = value
+
+    def ordered_metadata(self):
+        metadata = self.metadata.copy()
+        ordered = []
+        for key in METADATA_ORDER:
+            if key in metadata:
+                ordered.append((key, metadata.pop(key)))
+        for key in sorted(metadata, key=natural_key):
+            ordered.append((key, metadata[key]))
+        return ordered
+
+    def metadata_as_entry(self):
+        entry = POEntry(msgid='')
+        metadata = self.ordered_metadata()
+        if metadata:
+            entry.msgstr = '\n'.join(
+                '%s: %s' % (key, value) for key, value in metadata) + '\n'
+        if self.metadata_is_fuzzy:
+            entry.flags.append('fuzzy')
+        return entry
+
+    def find(self, st, by='msgid', include_obsolete_entries=False,
+             msgctxt=False):
+        for entry in self:
+            if entry.obsolete and not include_obsolete_entries:
+                continue
+            if getattr(entry, by) == st and \
+                    (msgctxt is False or entry.msgctxt == msgctxt):
+                return entry
+        return None
+
+    def translated_entries(self):
+        return [entry for entry in self if entry.translated()]
+
+    def untranslated_entries(self):
+        return [entry for entry in self
+                if not entry.translated() and not entry.obsolete
+                and not entry.fuzzy]
+
+    def fuzzy_entries(self):
+        return [entry for entry in self if entry.fuzzy and not entry.obsolete]
+
+    def obsolete_entries(self):
+        return [entry for entry in self if entry.obsolete]
+
+    def percent_translated(self):
+        total = len([entry for entry in self if not entry.obsolete])
+        if total == 0:
+            return 100
+        return int(len(self.translated_entries()) * 100 / float(total))
+
+    def merge(self, refpot):
+        """
+        Merge the template `refpot` into this file, like polib does
+        """
+        entries = {entry.msgid_with_context: entry for entry in self}
+        msgids = set()
+        for ref in refpot:
+            msgids.add(ref.msgid_with_context)
+            entry = entries.get(ref.msgid_with_context)
+            if entry is None:
+                entry = POEntry()
+                self.append(entry)
+            entry.merge(ref)
+        for entry in self:
+            if entry.msgid_with_context not in msgids:
+                entry.obsolete = True
+
+    def lines(self):
+        """
+        Generates the lines of the file, without trailing newlines
+        """
+        for header in self.header.split('\n'):
+            if not header:
+                yield '#'
+            elif header[:1] in (',', ':'):
+                yield '#%s' % header
+            else:
+                yield '# %s' % header
+
+        wrapwidth = self.wrapwidth
+        for line in self.metadata_as_entry().lines(wrapwidth):
+            yield line
+        for obsolete in (False, True):
+            for entry in self:
+                if bool(entry.obsolete) == obsolete:
+                    yield ''
+                    for line in entry.lines(wrapwidth):
+                        yield line
+
+    def __unicode__(self):
+        return '\n'.join(self.lines()) + '\n'
+
+    __str__ = __unicode__
+
+    def save(self, fpath=None):
+        fpath = fpath or self.fpath
+        if fpath is None:
+            raise IOError('You must provide a file path to save() method')
+        with io.open(fpath, 'w', encoding=self.encoding) as f:
+            f.writelines(line + '\n' for line in self.lines())
+        if self.fpath is None:
+            self.fpath = fpath
+
+
+def detect_encoding(data):
+    match = charset_re.search(data)
+    if match:
+        encoding = match.group(1).decode('ascii', 'replace').strip()
+        try:
+            codecs.lookup(encoding)
+            return encoding
+        except LookupError:
+            pass
+    return default_encoding
+
+
+def _syntax_error(po, linenum, message='Syntax error'):
+    fpath = '%s ' % po.fpath if po.fpath else ''
+    return IOError('%s in po file %s(line %s)' % (message, fpath, linenum))
+
+
+def _string(po, linenum, token):
+    """
+    Returns the unescaped value of the quoted string `token`
+    """
+    value = token[1:-1]
+    if len(token) < 2 or token[0] != '"' or token[-1] != '"' or \
+            ('"' in value and quote_re.search(value)):
+        raise _syntax_error(
+            po, linenum, 'Syntax error: unescaped double quote found')
+    return unescape(value)
+
+
+def parse(po, lines):
+    """
+    Adds the entries of the PO file `lines` to `po`, in a single pass
+    """
+    entry = POEntry(linenum=1)
+    entries = []
+    header = []
+    in_header = True
+    # whether the current entry has its msgid and its msgstr yet
+    has_msgid = done = False
+    # the field continuation lines are added to
+    field = index = None
+
+    for linenum, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        obsolete = line.startswith('#~')
+        if obsolete:
+            if line.startswith('#~|') or not line[2:].strip():
+                continue
+            line = line[2:].lstrip()
+
+        char = line[0]
+        if char == '"':
+            if field is None:
+                raise _syntax_error(po, linenum)
+            value = _string(po, linenum, line)
+            if field == 'msgstr_plural':
+                entry.msgstr_plural[index] += value
+            else:
+                setattr(entry, field, getattr(entry, field) + value)
+            continue
+
+        if char == '#':
+            if len(line) == 1 or line[1] == ' ' or line[1] == '#':
+                # translator comment, or the file header before any entry
+                if in_header:
+                    header.append(line[2:])
+                    continue
+                if done:
+                    if has_msgid:
+                        entries.append(entry)
+                    entry = POEntry(linenum=linenum)
+                    has_msgid = done = False
+                    field = None
+                comment = line.lstrip('#')
+                if comment.startswith(' '):
+                    comment = comment[1:]
+                if entry.tcomment:
+                    entry.tcomment += '\n'
+                entry.tcomment += comment
+                continue
+            else:
+                in_header = False
+                kind = line[:2]
+                value = line[2:].strip()
+                if kind == '#|':
+                    if not value:
+                        raise _syntax_error(po, linenum)
+                    if value[0] == '"':
+                        if field is None:
+                            raise _syntax_error(po, linenum)
+                        setattr(entry, field, getattr(entry, field)
+                                + _string(po, linenum, value))
+                        continue
+                    keyword, _, value = value.partition(' ')
+                    if keyword not in PREVIOUS_FIELDS:
+                        raise _syntax_error(
+                            po, linenum,
+                            'Syntax error: unknown keyword %s' % keyword)
+                elif kind not in ('#:', '#,', '#.'):
+                    raise _syntax_error(po, linenum)
+                if not value:
+                    continue
+                if done:
+                    if has_msgid:
+                        entries.append(entry)
+                    entry = POEntry(linenum=linenum)
+                    has_msgid = done = False
+                    field = None
+                if kind == '#:':
+                    occurrences = entry.occurrences
+                    for occurrence in value.split():
+                        path, sep, lineno = occurrence.rpartition(':')
+                        if not sep or not lineno.isdigit():
+                            path, lineno = occurrence, ''
+                        occurrences.append((path, lineno))
+                elif kind == '#,':
+                    entry.flags += [flag.strip() for flag in value.split(',')]
+                elif kind == '#.':
+                    if entry.comment:
+                        entry.comment += '\n'
+                    # keep the indentation after '#. '
+                    entry.comment += line[3:]
+                else:
+                    field = PREVIOUS_FIELDS[keyword]
+                    setattr(entry, field,
+                            _string(po, linenum, value.strip()))
+                continue
+
+        keyword, _, value = line.partition(' ')
+        in_header = False
+        if keyword == 'msgid' or keyword == 'msgctxt':
+            if done:
+                if has_msgid:
+                    entries.append(entry)
+                entry = POEntry(linenum=linenum)
+                has_msgid = done = False
+            if keyword == 'msgid':
+                has_msgid = True
+                entry.obsolete = obsolete
+        elif keyword == 'msgstr' or keyword == 'msgid_plural':
+            done = done or keyword == 'msgstr'
+        elif keyword.startswith('msgstr['):
+            index = int(keyword[7:-1])
+            entry.msgstr_plural[index] = _string(po, linenum, value.strip())
+            field = 'msgstr_plural'
+            done = True
+            continue
+        else:
+            raise _syntax_error(
+                po, linenum, 'Syntax error: unknown keyword %s' % keyword)
+        setattr(entry, keyword, _string(po, linenum, value.strip()))
+        field = keyword
+
+    if has_msgid:
+        entries.append(entry)
+
+    po.header = '\n'.join(header)
+    for entry in entries:
+        if entry.msgid == '' and not entry.obsolete:
+            entries.remove(entry)
+            po.metadata_is_fuzzy = entry.flags
+            po._header_msgstr = entry.msgstr
+            break
+    po.extend(entries)
+    return po
+
+
+def detect_file_encoding(path):
+    """
+    Returns the charset of the PO file at `path`, searching its bytes
+    without reading them into memory
+    """
+    with io.open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            # empty files can't be mapped
+            return default_encoding
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return detect_encoding(buf)
+
+
+def strip_bom(lines):
+    lines = iter(lines)
+    for line in lines:
+        yield line[1:] if line.startswith('\ufeff') else line
+        break
+    yield from lines
+
+
+def pofile(path, wrapwidth=78, encoding=None, **kwargs):
+    """
+    Parses the PO file at `path` into a POFile, reading it line by line
+    """
+    if encoding is None:
+        encoding = detect_file_encoding(path)
+    po = POFile(fpath=path, wrapwidth=wrapwidth, encoding=encoding)
+    # only '\n' ends a line, like in the files written by gettext and polib
+    with io.open(path, 'r', encoding=encoding, newline='\n') as f:
+        return parse(po, strip_bom(f))
@@ -0,0 +1,160 @@
+import heapq
+import io
+import json
+import sys
+import time
+from collections import OrderedDict, namedtuple
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+# the phases of a run, in the order they are reported
+PHASES = ('discovery', 'read', 'scan', 'po_load', 'merge', 'save')
+
+# number of files listed as the slowest ones
+SLOWEST_FILES = 10
+
+# what is measured for every scanned file, `prefiltered` if it contains no
+# keyword and was not actually scanned
+FileStats = namedtuple(
+    'FileStats', ('bytes', 'lines', 'read', 'scan', 'prefiltered'),
+    defaults=(False,))
+
+
+def get_peak_rss():
+    """
+    Returns the peak resident set size of this process and its finished
+    children in bytes, or None if it can't be measured
+    """
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # kilobytes everywhere but on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Stats(object):
+    """
+    Timings and counters of an extraction run.
+
+    The read and scan times are summed over all files, so with several jobs
+    they are CPU seconds rather than wall clock time.
+    """
+
+    def __init__(self, slowest=SLOWEST_FILES):
+        self.start = time.perf_counter()
+        self.phases = OrderedDict((phase, 0.0) for phase in PHASES)
+        self.files = 0
+        self.cached_files = 0
+        self.skipped_files = 0
+        self.prefiltered_files = 0
+        self.bytes = 0
+        self.lines = 0
+        self.matches = 0
+        self.slowest = slowest
+        # heap of (seconds, path) of the slowest files
+        self.slowest_files = []
+
+    def timed(self, name, iterable):
+        """
+        Generates the items of `iterable`, adding the time spent producing
+        them to the phase `name`
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.phases[name] += time.perf_counter() - start
+            yield item
+
+    def add_file(self, path, file_stats, matches):
+        """
+        Records a file with `matches` matches, None if it was skipped.
+        `file_stats` is None for cached files. Only the scanned files count
+        towards the bytes, lines and timings.
+        """
+        if matches is None:
+            self.skipped_files += 1
+            return
+        self.matches += matches
+        if file_stats is None:
+            self.cached_files += 1
+            return
+        self.files += 1
+        if file_stats.prefiltered:
+            self.prefiltered_files += 1
+        self.bytes += file_stats.bytes
+        self.lines += file_stats.lines
+        self.phases['read'] += file_stats.read
+        self.phases['scan'] += file_stats.scan
+        item = (file_stats.read + file_stats.scan, path)
+        if len(self.slowest_files) < self.slowest:
+            heapq.heappush(self.slowest_files, item)
+        else:
+            heapq.heappushpop(self.slowest_files, item)
+
+    def add_timings(self, timings):
+        for name, seconds in timings.items():
+            self.phases[name] += seconds
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.start
+        scanned = self.phases['read'] + self.phases['scan']
+        return OrderedDict((
+            ('elapsed', elapsed),
+            ('phases', self.phases),
+            ('files', self.files),
+            ('cached_files', self.cached_files),
+            ('skipped_files', self.skipped_files),
+            ('prefiltered_files', self.prefiltered_files),
+            ('bytes', self.bytes),
+            ('lines', self.lines),
+            ('matches', self.matches),
+            ('files_per_second', self.files / scanned if scanned else None),
+            ('slowest_files', [
+                OrderedDict((('path', path), ('seconds', seconds)))
+                for seconds, path in sorted(self.slowest_files, reverse=True)
+            ]),
+            ('peak_rss', get_peak_rss()),
+        ))
+
+    def report(self):
+        """
+        Returns the statistics as human readable lines
+        """
+        data = self.as_dict()
+        lines = ["Time: %.3fs" % data['elapsed']]
+        for name, seconds in data['phases'].items():
+            lines.append("  %-10s %9.3fs" % (name, seconds))
+        lines.append(
+            "Files: %s scanned (%s without keywords), %s cached, %s skipped"
+            % (data['files'], data['prefiltered_files'], data['cached_files'],
+               data['skipped_files']))
+        lines.append(
+            "Scanned: %s bytes, %s lines, %s matches"
+            % (data['bytes'], data['lines'], data['matches']))
+        if data['files_per_second'] is not None:
+            scanned = data['phases']['read'] + data['phases']['scan']
+            lines.append("Throughput: %.1f files/s, %.2f MB/s" % (
+                data['files_per_second'], data['bytes'] / scanned / 1e6))
+        if data['slowest_files']:
+            lines.append("Slowest files:")
+            for item in data['slowest_files']:
+                lines.append("  %9.3fs %s" % (item['seconds'], item['path']))
+        if data['peak_rss'] is not None:
+            lines.append("Peak RSS: %.1f MB" % (data['peak_rss'] / 1e6))
+        return lines
+
+    def save(self, path):
+        with io.open(path, 'w', encoding='utf8') as f:
+            f.write(json.dumps(self.as_dict(), indent=2))
@@ -0,0 +1,266 @@
+"""
+Single pass extractor for JavaScript, TypeScript and Vue/HTML sources.
+
+Unlike `gettext_re`, the tokenizer knows about comments, escaped quotes,
+template literals and regular expression literals, so it only reports calls
+that are actually code. Every token is matched once from left to right and
+call sites are recognised with a bounded lookahead, so the running time is
+linear in the size of the source even for very long lines.
+"""
+
+import re
+
+from .keywords import get_arity, get_message, parse_keyword
+
+MARKUP_EXTENSIONS = ('.vue', '.html', '.htm')
+
+# number of tokens between the calls of the `check` of a Tokenizer
+CHECK_INTERVAL = 1024
+
+_string = (
+    r"""'(?:[^'\\\n]|\\[\s\S])*'"""
+    r'''|"(?:[^"\\\n]|\\[\s\S])*"'''
+)
+
+# JavaScript tokens; anything else is skipped by `search`
+js_token_re = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+    |(?P<string>'(?:[^'\\\n]|\\[\s\S])*'?|"(?:[^"\\\n]|\\[\s\S])*"?)
+    |(?P<template>`)
+    |(?P<ident>[A-Za-z_$][\w$]*)
+    |(?P<number>\d[\w.]*)
+    |(?P<open>\{)
+    |(?P<close>\})
+    |(?P<punct>[()\[\]/])
+    |(?P<operator>[-=,:;!&|?+*%<>~^.])
+""", re.VERBOSE)
+
+# the rest of a template literal, up to its end or the next substitution
+template_re = re.compile(r"""(?:[^`\\$]|\\[\s\S]|\$(?!\{))*(?:`|\$\{|\Z)""")
+
+regex_re = re.compile(r"""
+    /(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*
+""", re.VERBOSE)
+
+# outside of <script> elements only calls, comments and scripts matter
+markup_token_re = re.compile(r"""
+    (?P<comment><!--[\s\S]*?(?:-->|\Z))
+    |(?P<script><script\b[^>]*>)
+    |(?P<ident>[A-Za-z_$][\w$]*)
+""", re.VERBOSE | re.IGNORECASE)
+
+script_end_re = re.compile(r"""</script\s*>""", re.IGNORECASE)
+
+# the argument list of a call with a single literal string argument
+call_re = re.compile(r"""
+    \s*\(\s*
+    (?P<literal>%s|`(?:[^`\\$]|\\[\s\S]|\$(?!\{))*`)
+    \s*\)
+""" % _string, re.VERBOSE)
+
+# a literal string argument of a call with several arguments, followed by the
+# comma or parenthesis after it
+argument_re = re.compile(r"""
+    \s*
+    (?P<literal>%s|`(?:[^`\\$]|\\[\s\S]|\$(?!\{))*`)
+    \s*(?P<end>[,)])
+""" % _string, re.VERBOSE)
+
+open_re = re.compile(r"""\s*\(""")
+
+escape_re = re.compile(r"""
+    \\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\r\n|[\s\S])
+""", re.VERBOSE)
+
+ESCAPES = {
+    'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v',
+    '0': '\0', '\n': '', '\r\n': '', '\u2028': '', '\u2029': '',
+}
+
+# tokens after which a slash starts a regular expression, not a division
+REGEX_PRECEDING_WORDS = frozenset((
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+))
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if escape[0] in 'ux' and len(escape) > 1:
+        return chr(int(escape.strip('u{}x'), 16))
+    return ESCAPES.get(escape, escape)
+
+
+def unquote(literal):
+    """
+    Returns the value of the string or template `literal`
+    """
+    return escape_re.sub(_unescape, literal[1:-1])
+
+
+def is_markup(path):
+    return path.lower().endswith(MARKUP_EXTENSIONS)
+
+
+class Tokenizer(object):
+    """
+    Finds the calls of the functions in the keyword specs `keywords` (or
+    their `$keyword` aliases) with literal strings as the arguments the specs
+    use in `text`
+    """
+
+    def __init__(self, text, keywords, check=None):
+        if isinstance(keywords, str):
+            keywords = (keywords,)
+        self.text = text
+        # name -> KeywordSpec
+        self.keywords = {}
+        for keyword in keywords:
+            spec = parse_keyword(keyword)
+            self.keywords[spec.name] = spec
+        for name, spec in list(self.keywords.items()):
+            self.keywords.setdefault('$' + name, spec)
+        self.line = 1
+        self.line_pos = 0
+        # called every CHECK_INTERVAL tokens, e.g. to stop at a deadline
+        self.check = check
+        self.tokens = 0
+
+    def count(self):
+        self.tokens += 1
+        if self.check is not None and self.tokens % CHECK_INTERVAL == 0:
+            self.check()
+
+    def lineno(self, pos):
+        self.line += self.text.count('\n', self.line_pos, pos)
+        self.line_pos = pos
+        return self.line
+
+    def call(self, start, end):
+        """
+        Returns (msgid, lineno, end) for a call at the identifier spanning
+        `start` to `end`, or None
+        """
+        spec = self.keywords[self.text[start:end]]
+        arity = get_arity(spec)
+        if arity == 1:
+            match = call_re.match(self.text, end)
+            if match is None:
+                return None
+            msgid = get_message([unquote(match.group('literal'))], spec)
+            return msgid, self.lineno(start), match.end()
+
+        match = open_re.match(self.text, end)
+        if match is None:
+            return None
+        args = []
+        while len(args) < arity:
+            match = argument_re.match(self.text, match.end())
+            if match is None or (
+                    match.group('end') == ')' and len(args) < arity - 1):
+                return None
+            args.append(unquote(match.group('literal')))
+        return get_message(args, spec), self.lineno(start), match.end()
+
+    def js(self, pos, end):
+        """
+        Generates (msgid, lineno, pos) for the calls in the script between
+        `pos` and `end`
+        """
+        text = self.text
+        # stack of open braces, True for the ones of template substitutions
+        braces = []
+        regex_allowed = True
+        # no regular expression starts before this position, see below
+        regex_horizon = pos
+        while pos < end:
+            match = js_token_re.search(text, pos, end)
+            if match is None:
+                return
+            self.count()
+            kind = match.lastgroup
+            pos = match.end()
+
+            if kind == 'ident':
+                if match.group() in self.keywords:
+                    call = self.call(match.start(), pos)
+                    if call is not None:
+                        yield call
+                        pos = call[2]
+                        regex_allowed = False
+                        continue
+                regex_allowed = match.group() in REGEX_PRECEDING_WORDS
+            elif kind == 'template':
+                pos = self.template(pos, end, braces)
+                regex_allowed = False
+            elif kind == 'open':
+                braces.append(False)
+                regex_allowed = True
+            elif kind == 'close':
+                if braces and braces.pop():
+                    pos = self.template(pos, end, braces)
+                regex_allowed = False
+            elif kind == 'punct':
+                char = match.group()
+                if char == '/' and regex_allowed and pos > regex_horizon:
+                    regex = regex_re.match(text, match.start(), end)
+                    if regex is not None:
+                        pos = regex.end()
+                        regex_allowed = False
+                        continue
+                    # the match failed at the end of the line, don't look
+                    # for another unterminated regular expression on it
+                    regex_horizon = text.find('\n', pos, end)
+                    if regex_horizon == -1:
+                        regex_horizon = end
+                regex_allowed = char in '([/'
+            elif kind == 'operator':
+                regex_allowed = True
+            elif kind in ('string', 'number'):
+                regex_allowed = False
+
+    def template(self, pos, end, braces):
+        """
+        Skips the template literal text at `pos`, returns the position after
+        it or after the start of its next substitution
+        """
+        match = template_re.match(self.text, pos, end)
+        if match.group().endswith('${'):
+            braces.append(True)
+        return match.end()
+
+    def markup(self):
+        """
+        Generates (msgid, lineno, pos) for the calls in an HTML or Vue file
+        """
+        text = self.text
+        pos = 0
+        while True:
+            match = markup_token_re.search(text, pos)
+            if match is None:
+                return
+            self.count()
+            kind = match.lastgroup
+            pos = match.end()
+
+            if kind == 'ident':
+                if match.group() in self.keywords:
+                    call = self.call(match.start(), pos)
+                    if call is not None:
+                        yield call
+                        pos = call[2]
+            elif kind == 'script':
+                script_end = script_end_re.search(text, pos)
+                end = script_end.start() if script_end else len(text)
+                for call in self.js(pos, end):
+                    yield call
+                pos = end
+
+
+def get_msgids_tokenized(text, keywords, markup=False, check=None):
+    '''Generates (match, lineno) pairs, calling `check` every
+    CHECK_INTERVAL tokens.'''
+    tokenizer = Tokenizer(text, keywords, check)
+    calls = tokenizer.markup() if markup else tokenizer.js(0, len(text))
+    for msgid, lineno, _ in calls:
+        yield (msgid, lineno)
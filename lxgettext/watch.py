@@ -0,0 +1,329 @@
+"""
+Watch mode: keep the PO files up to date while the sources are edited.
+
+The catalogs and the matches of every source file are kept in memory, so a
+change only costs scanning the modified files and writing the PO files.
+Changes are detected by comparing the size and modification time of the
+files; on Linux, inotify wakes the watcher up as soon as something changes
+instead of polling every `--watch-interval` seconds.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import sys
+import time
+from collections import OrderedDict
+
+from .lxgettext import (
+    COLOUR_END, COLOUR_GREEN, get_scan_options, get_targets, iter_paths,
+    load_po, matches_any, merge_po, scan_file, scan_paths,
+)
+from .occurrences import Occurrences
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+              | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+
+
+def get_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class PollingObserver(object):
+    """
+    Reports the files in `paths` that were added, modified or deleted since
+    the previous call of `changes`
+    """
+
+    def __init__(self, paths, include=(), exclude=(), interval=1.0):
+        self.paths = paths
+        self.include = include
+        self.exclude = exclude
+        self.interval = interval
+        self.stamps = self.snapshot()
+
+    def snapshot(self):
+        return OrderedDict(
+            (path, get_stamp(path))
+            for path in iter_paths(self.paths, self.include, self.exclude)
+        )
+
+    def changes(self):
+        """
+        Returns (changed paths, deleted paths)
+        """
+        stamps = self.snapshot()
+        changed = [
+            path for path, stamp in stamps.items()
+            if self.stamps.get(path) != stamp
+        ]
+        deleted = [path for path in self.stamps if path not in stamps]
+        self.stamps = stamps
+        return changed, deleted
+
+    def wait(self, timeout):
+        """
+        Waits up to `timeout` seconds for something to change
+        """
+        time.sleep(min(timeout, self.interval))
+
+    def close(self):
+        pass
+
+
+class InotifyObserver(PollingObserver):
+    """
+    PollingObserver that waits for inotify events on the directories instead
+    of sleeping. Raises OSError if inotify is not available.
+    """
+
+    def __init__(self, paths, include=(), exclude=(), interval=1.0):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        try:
+            self.add_watch = libc.inotify_add_watch
+        except AttributeError:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # fail if not all directories can be watched at the start, e.g.
+        # because of the limit on the number of watches
+        self.strict = True
+        try:
+            PollingObserver.__init__(self, paths, include, exclude, interval)
+        except OSError:
+            os.close(self.fd)
+            raise
+        self.strict = False
+
+    def iter_directories(self):
+        for path in self.paths:
+            if not os.path.isdir(path):
+                # files are watched through their directory
+                path = os.path.dirname(path) or '.'
+                yield path
+                continue
+            for dirpath, dirnames, _ in os.walk(path):
+                yield dirpath
+                relpath = os.path.relpath(dirpath, path)
+                prefix = '' if relpath == '.' else relpath + '/'
+                dirnames[:] = sorted(
+                    name for name in dirnames
+                    if not matches_any(name, self.exclude)
+                    and not matches_any(prefix + name, self.exclude)
+                )
+
+    def snapshot(self):
+        # watching a directory again is cheap, and takes care of the ones
+        # that were created (or deleted and created again) since the last
+        # snapshot. Directories that can't be watched are still polled.
+        for directory in self.iter_directories():
+            wd = self.add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0 and self.strict:
+                raise OSError(ctypes.get_errno(),
+                              "Can't watch %s" % directory)
+        return PollingObserver.snapshot(self)
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            # only the wake up matters, `changes` finds out what changed
+            try:
+                while os.read(self.fd, 1 << 16):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+def get_observer(paths, include=(), exclude=(), interval=1.0):
+    """
+    Returns an InotifyObserver where inotify is available, a
+    PollingObserver otherwise
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyObserver(paths, include, exclude, interval)
+        except OSError as e:
+            sys.stderr.write("inotify unavailable (%s), polling instead\n" % e)
+    return PollingObserver(paths, include, exclude, interval)
+
+
+class Watcher(object):
+    """
+    Keeps the PO files of `args` up to date with the files at `paths`.
+    The loaded catalogs and the (match, lineno) pairs of every file are
+    kept in memory between updates.
+    """
+
+    def __init__(self, paths, args, cache=None):
+        self.paths = paths
+        self.args = args
+        self.options = get_scan_options(args)
+        self.targets = get_targets(args)
+        # path -> [(match, lineno), ...]
+        self.files = {}
+        # like `extract_matches`
+        self.matches = Occurrences()
+        # path -> (POFile, stamp of the file when it was loaded or written)
+        self.catalogs = {}
+        # changes of the files written by the watcher itself are ignored
+        self.outputs = set(
+            os.path.abspath(output) for _, output in self.targets)
+        if args.watch_json:
+            self.outputs.update(
+                os.path.abspath(args.watch_json.format(lang=language))
+                for language, _ in self.targets)
+
+        files = iter_paths(paths, args.include, args.exclude)
+        for path, matches in scan_paths(
+                files, args.jobs, cache, self.options):
+            self.add(path, matches or [])
+        if cache is not None:
+            cache.save()
+
+    def add(self, path, matches):
+        self.files[path] = matches
+        self.matches.add_file(path, matches)
+
+    def remove(self, path):
+        matches = self.files.pop(path, ())
+        self.matches.remove_file(path, [match for match, _ in matches])
+
+    def update(self, changed, deleted):
+        """
+        Rescans the `changed` files and forgets the `deleted` ones.
+        Returns whether any of them is a source file.
+        """
+        changed = [
+            path for path in changed
+            if os.path.abspath(path) not in self.outputs]
+        deleted = [
+            path for path in deleted
+            if os.path.abspath(path) not in self.outputs]
+        for path in deleted:
+            self.remove(path)
+        for path in changed:
+            self.remove(path)
+            try:
+                _, matches = scan_file(path, self.options)
+            except (IOError, OSError, UnicodeDecodeError) as e:
+                # e.g. deleted again before it could be read
+                sys.stderr.write("%s: %s\n" % (path, e))
+                continue
+            self.add(path, matches or [])
+        return bool(changed or deleted)
+
+    def get_catalog(self, output):
+        """
+        Returns the POFile of `output`, loaded again if the file was changed
+        by someone else
+        """
+        if self.args.pot:
+            return None
+        po, stamp = self.catalogs.get(output, (None, None))
+        if po is None or get_stamp(output) != stamp:
+            po, _ = load_po(output, self.args)
+        return po
+
+    def write(self):
+        """
+        Writes the PO files, and their JSON translations with `watch_json`.
+        Returns a MergeResult for every PO file.
+        """
+        results = []
+        for language, output in self.targets:
+            po = self.get_catalog(output)
+            result = merge_po(self.matches, (language, output), self.args, po)
+            if po is not None:
+                self.catalogs[output] = (po, get_stamp(output))
+            if self.args.watch_json:
+                self.write_json(po, language, output)
+            results.append(result)
+        return results
+
+    def write_json(self, po, language, output):
+        from .lpo2json import get_translations, write_json
+        from .pofile import pofile
+
+        if po is None:
+            po = pofile(output)
+        write_json(get_translations(po),
+                   self.args.watch_json.format(lang=language))
+
+    def watch(self, observer, debounce=0.5, report=None):
+        """
+        Updates the PO files whenever the `observer` reports changes, once
+        nothing changed for `debounce` seconds. `report` is called with the
+        MergeResults of every write.
+        Runs until interrupted.
+        """
+        last_change = None
+        try:
+            while True:
+                if last_change is None:
+                    observer.wait(observer.interval)
+                else:
+                    observer.wait(max(
+                        0, last_change + debounce - time.monotonic()))
+                if self.update(*observer.changes()):
+                    last_change = time.monotonic()
+                elif last_change is not None and \
+                        time.monotonic() - last_change >= debounce:
+                    results = self.write()
+                    last_change = None
+                    if report is not None:
+                        report(results)
+        except KeyboardInterrupt:
+            if last_change is not None:
+                results = self.write()
+                if report is not None:
+                    report(results)
+        finally:
+            observer.close()
+
+
+def print_results(results):
+    for result in results:
+        message = "%s %s: %s new, %s total" % (
+            time.strftime("%X"), result.path, result.new_entries,
+            result.extracted)
+        if not result.changed:
+            message += ", unchanged"
+        if result.new_entries > 0:
+            message = COLOUR_GREEN + message + COLOUR_END
+        print(message)
+    sys.stdout.flush()
+
+
+def watch(paths, args, cache=None):
+    """
+    Writes the PO files of `args` and keeps updating them until interrupted
+    """
+    paths = list(paths)
+    watcher = Watcher(paths, args, cache)
+    print_results(watcher.write())
+    observer = get_observer(
+        paths, args.include, args.exclude, args.watch_interval)
+    print("Watching %s for changes, press Ctrl-C to stop" % ", ".join(paths))
+    sys.stdout.flush()
+    watcher.watch(observer, args.watch_debounce, print_results)
@@ -5,7 +5,10 @@ merge_translations.py <output_locale_dir> <input_locale_dir>...
 compile several django projects' PO files into one
 '''
 
-import polib
+try:
+    from lxgettext import pofile as polib
+except ImportError:
+    import polib
 
 from functools import reduce
 from operator import iconcat
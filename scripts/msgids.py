@@ -5,7 +5,10 @@ msgids.py <pofile>... > msgids.txt
 extract all msgids with comments
 '''
 
-import polib
+try:
+    from lxgettext import pofile as polib
+except ImportError:
+    import polib
 import sys
 
 
@@ -7,7 +7,10 @@ For each untranslated string, copy the msgid to the msgstr. If a second pofile
 is mentioned on the command line, use the first one to determine which strings
 are untranslated, but use the second one to actually produce the output.'''
 
-import polib
+try:
+    from lxgettext import pofile as polib
+except ImportError:
+    import polib
 import sys
 
 
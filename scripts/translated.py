@@ -5,7 +5,10 @@ translated.py <pofile>... > translated.txt
 extract all translated messages with comments
 '''
 
-import polib
+try:
+    from lxgettext import pofile as polib
+except ImportError:
+    import polib
 import sys
 
 
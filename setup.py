@@ -16,6 +16,7 @@ setup(
     entry_points={
         "console_scripts": [
             "lxgettext = lxgettext.lxgettext:main",
+            "lxgettext-merge = lxgettext.merge:main",
             "lpo2json = lxgettext.lpo2json:main"
         ]
     },
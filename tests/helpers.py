@@ -0,0 +1,45 @@
+import contextlib
+import os
+import shutil
+import tempfile
+import unittest
+
+
+@contextlib.contextmanager
+def tmpfile(contents=None):
+    try:
+        with tempfile.NamedTemporaryFile('w', delete=False) as f:
+            filepath = f.name
+            if contents is not None:
+                f.write(contents)
+        yield filepath
+    finally:
+        os.remove(filepath)
+
+
+@contextlib.contextmanager
+def tmpdir():
+    try:
+        dirname = tempfile.mkdtemp()
+        yield dirname
+    finally:
+        shutil.rmtree(dirname)
+
+
+class Args(object):
+    """The command line options passed to `update_po`"""
+
+    def __init__(self, output, prune=False, **options):
+        self.output = output
+        self.prune = prune
+        self.version = 'test'
+        self.language = 'xx'
+        self.__dict__.update(options)
+
+
+class TmpdirTestCase(unittest.TestCase):
+    """Runs every test with a new temporary directory `self.dpath`"""
+
+    def setUp(self):
+        self.dpath = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dpath)
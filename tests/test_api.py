@@ -0,0 +1,72 @@
+import io
+import itertools
+import os
+import unittest
+from unittest import mock
+
+import lxgettext
+
+from .helpers import TmpdirTestCase
+
+
+class TestAPI(TmpdirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.sources = os.path.join(self.dpath, 'src')
+        os.mkdir(self.sources)
+        for name, source in (('a.js', "gettext('a');\nngettext('b');"), ('b.vue', "$gettext('c');"),
+                             ('c.txt', "gettext('ignored');")):
+            with open(os.path.join(self.sources, name), 'w') as f:
+                f.write(source)
+
+    def test_extract(self):
+        apath = os.path.join(self.sources, 'a.js')
+        self.assertEqual(
+            [lxgettext.Message('a', apath, 1), lxgettext.Message('b', apath, 2)],
+            list(lxgettext.extract(apath)),
+        )
+        messages = lxgettext.extract(
+            [self.sources], keywords=('ngettext', '$gettext'), include=['*.js', '*.vue'], parser='tokenizer')
+        self.assertEqual(['b', 'c'], [message.msgid for message in messages])
+
+    def test_update_catalog(self):
+        popath = os.path.join(self.dpath, 'xx.po')
+        cache_dir = os.path.join(self.dpath, 'cache')
+        result = lxgettext.update_catalog([self.sources], popath, cache_dir=cache_dir, include=['*.js'])
+        self.assertEqual((2, 2, True), result[:3])
+        self.assertEqual([popath], [catalog.path for catalog in result.catalogs])
+
+        result = lxgettext.update_catalog(
+            [self.sources], popath, cache_dir=cache_dir, include=['*.js'], skip_unchanged=True)
+        self.assertEqual((2, 0, False), result[:3])
+
+    def test_keyword_string(self):
+        messages = lxgettext.extract(self.sources, keywords='ngettext')
+        self.assertEqual(['b'], [message.msgid for message in messages])
+
+    def test_skipped_files(self):
+        bpath = os.path.join(self.sources, 'b.js')
+        with open(bpath, 'wb') as f:
+            f.write(b"gettext('\xff');")
+        with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            messages = list(lxgettext.extract(bpath))
+        self.assertEqual([], messages)
+        self.assertEqual('', stderr.getvalue())
+
+        with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr, \
+                mock.patch('time.monotonic', side_effect=itertools.count(0, 100)):
+            messages = list(lxgettext.extract(self.sources, include=['*.js'], file_timeout=1, on_error='warn'))
+        self.assertEqual([], messages)
+        self.assertIn('a.js: skipped, scanning took longer than 1 seconds\n', stderr.getvalue())
+        self.assertIn('b.js: skipped, ', stderr.getvalue())
+
+    def test_unknown_option(self):
+        with self.assertRaises(TypeError):
+            list(lxgettext.extract(self.sources, sort_output=True, colour=True))
+        with self.assertRaises(ValueError):
+            lxgettext.update_catalog(self.sources)
+
+
+if __name__ == '__main__':
+    unittest.main()
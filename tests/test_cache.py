@@ -0,0 +1,101 @@
+import contextlib
+import io
+import os
+import unittest
+from unittest import mock
+
+from lxgettext.cache import ExtractionCache
+from lxgettext.lxgettext import DEFAULT_SCAN_OPTIONS, scan_paths
+
+from .helpers import tmpdir
+
+
+class TestExtractionCache(unittest.TestCase):
+
+    def scan(self, cache, paths, options=DEFAULT_SCAN_OPTIONS):
+        result = list(scan_paths(paths, cache=cache, options=options))
+        cache.save()
+        return result
+
+    def write(self, path, contents, mtime):
+        with open(path, 'w') as f:
+            f.write(contents)
+        os.utime(path, (mtime, mtime))
+
+    def test_reuse(self):
+        with tmpdir() as dpath:
+            spath = os.path.join(dpath, 'a.js')
+            self.write(spath, "gettext('first');", 1000)
+
+            cache = ExtractionCache(dpath, 'sig')
+            self.assertEqual([(spath, [('first', 1)])], self.scan(cache, [spath]))
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+            cache = ExtractionCache(dpath, 'sig')
+            self.assertEqual([(spath, [('first', 1)])], self.scan(cache, [spath]))
+            self.assertEqual((1, 0), (cache.hits, cache.misses))
+
+            self.write(spath, "gettext('other');", 2000)
+            cache = ExtractionCache(dpath, 'sig')
+            self.assertEqual([(spath, [('other', 1)])], self.scan(cache, [spath]))
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_signature(self):
+        with tmpdir() as dpath:
+            spath = os.path.join(dpath, 'a.js')
+            self.write(spath, "gettext('first');", 1000)
+            self.scan(ExtractionCache(dpath, 'sig'), [spath])
+
+            cache = ExtractionCache(dpath, 'other-sig')
+            self.scan(cache, [spath])
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_verify(self):
+        with tmpdir() as dpath:
+            spath = os.path.join(dpath, 'a.js')
+            self.write(spath, "gettext('first');", 1000)
+            self.scan(ExtractionCache(dpath, 'sig', verify=True), [spath])
+
+            # touched but unchanged
+            self.write(spath, "gettext('first');", 2000)
+            cache = ExtractionCache(dpath, 'sig', verify=True)
+            self.scan(cache, [spath])
+            self.assertEqual((1, 0), (cache.hits, cache.misses))
+
+            # same size and mtime, different contents
+            self.write(spath, "gettext('other');", 2000)
+            cache = ExtractionCache(dpath, 'sig', verify=True)
+            self.assertEqual([(spath, [('other', 1)])], self.scan(cache, [spath]))
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_skipped(self):
+        with tmpdir() as dpath:
+            spath = os.path.join(dpath, 'a.js')
+            missing = os.path.join(dpath, 'missing.js')
+            self.write(spath, "gettext('first');", 1000)
+
+            for verify in (False, True):
+                cache = ExtractionCache(dpath, 'sig', verify=verify)
+                stderr = io.StringIO()
+                with contextlib.redirect_stderr(stderr):
+                    self.assertEqual(
+                        [(missing, None), (spath, [('first', 1)])],
+                        self.scan(cache, [missing, spath]))
+                self.assertIn('missing.js: skipped', stderr.getvalue())
+                with self.assertRaises(OSError):
+                    self.scan(cache, [missing], DEFAULT_SCAN_OPTIONS._replace(on_error='fail'))
+
+    def test_verify_max_file_size(self):
+        with tmpdir() as dpath:
+            spath = os.path.join(dpath, 'a.js')
+            self.write(spath, "gettext('first');", 1000)
+            options = DEFAULT_SCAN_OPTIONS._replace(max_file_size=10, on_error='skip')
+
+            cache = ExtractionCache(dpath, 'sig', verify=True)
+            with mock.patch('lxgettext.cache.get_digest') as get_digest:
+                self.assertEqual([(spath, None)], self.scan(cache, [spath], options))
+            get_digest.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import pstats
+import sys
+import unittest
+from unittest import mock
+
+from lxgettext import lxgettext
+from lxgettext.lxgettext import add_hook, remove_hook, update_po
+
+from .helpers import Args, tmpdir
+
+
+class TestHooks(unittest.TestCase):
+
+    def test_hooks(self):
+        events = []
+        callbacks = {
+            'on_file_start': lambda path: events.append(('start', path)),
+            'on_file_done': lambda path, matches, file_stats: events.append(
+                ('done', path, matches, file_stats.bytes)),
+            'on_match': lambda path, msgid, lineno: events.append(('match', path, msgid, lineno)),
+            'on_save': lambda result: events.append(('save', result.path, sorted(result.timings))),
+        }
+        for event, callback in callbacks.items():
+            add_hook(event, callback)
+        try:
+            with tmpdir() as dpath:
+                spath = os.path.join(dpath, 'a.js')
+                with open(spath, 'w') as f:
+                    f.write("gettext('a');")
+                popath = os.path.join(dpath, 'xx.po')
+                update_po([spath], Args(popath))
+        finally:
+            for event, callback in callbacks.items():
+                remove_hook(event, callback)
+
+        self.assertEqual([
+            ('start', spath),
+            ('done', spath, [('a', 1)], 13),
+            ('match', spath, 'a', 1),
+            ('save', popath, ['merge', 'po_load', 'save']),
+        ], events)
+        self.assertTrue(all(not callbacks for callbacks in lxgettext.hooks.values()))
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            add_hook('on_everything', print)
+
+    def test_profile(self):
+        with tmpdir() as dpath:
+            spath = os.path.join(dpath, 'a.js')
+            with open(spath, 'w') as f:
+                f.write("gettext('a');")
+            profile = os.path.join(dpath, 'profile')
+            argv = ['lxgettext', '--no-cache', '-o', os.path.join(dpath, 'xx.po'), '--profile', profile, spath]
+            with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout'):
+                lxgettext.main()
+            functions = [function for _, _, function in pstats.Stats(profile).stats]
+            self.assertIn('update_po', functions)
+
+
+if __name__ == '__main__':
+    unittest.main()
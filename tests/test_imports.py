@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestImports(unittest.TestCase):
+    """The command line tools only import what they use"""
+
+    def imported(self, module, names):
+        code = "import sys, %s; print(' '.join(name for name in %r if name in sys.modules))" % (module, names)
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        return subprocess.check_output([sys.executable, '-c', code], env=env).decode().split()
+
+    def test_lxgettext(self):
+        names = ('polib', 'multiprocessing', 'datetime', 'hashlib', 'lxgettext.pofile', 'lxgettext.tokenizer',
+                 'lxgettext.stats', 'lxgettext.api', 'lxgettext.watch', 'lxgettext.git')
+        self.assertEqual([], self.imported('lxgettext.lxgettext', names))
+
+    def test_lpo2json(self):
+        self.assertEqual([], self.imported('lxgettext.lpo2json', ('polib', 'pprint', 'lxgettext.lxgettext')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,47 +1,58 @@
 # coding: utf8
 # flake8: E501
 
-import contextlib
+import io
+import itertools
 import os
-import shutil
-import tempfile
+import re
 import unittest
+from unittest import mock
 
-from lxgettext.lxgettext import generate_po, get_msgids, update_po
+import polib
+
+from lxgettext.lxgettext import (
+    DEFAULT_SCAN_OPTIONS, generate_po, get_msgids, get_msgids_chunked, get_number_of_entries, iter_paths,
+    read_path_list, scan_file, update_po,
+)
+
+from .helpers import Args, tmpdir, tmpfile
 
 
 class TestInput(unittest.TestCase):
     def setUp(self):
         self.path = "__init__.py"
 
+    def generate_po(self, data, filename):
+        return generate_po(data, filename)
+
     def test_lonely_warrior_dq(self):
         data = """gettext("Warrior")"""
         expected = 'msgid "Warrior"'
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn(expected, result)
 
     def test_lonely_warrior_sq(self):
         data = """gettext('Warrior')"""
         expected = 'msgid "Warrior"'
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn(expected, result)
 
     def test_sentence(self):
         data = """gettext('I want ice cream')"""
         expected = 'msgid "I want ice cream"'
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn(expected, result)
 
     def test_quotes(self):
         data = """gettext('H"O"T')"""
         expected = 'msgid "H"O"T"'
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn(expected, result)
 
     def test_widget(self):
         data = """blockPage(Surfly.i18n.gettext('Cobrowsing session is opened in a separate tab.') + " " +"""
         expected = 'msgid "Cobrowsing session is opened in a separate tab."'
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn(expected, result)
 
     def test_widget2(self):
@@ -49,7 +60,7 @@ class TestInput(unittest.TestCase):
                 blockPage(Surfly.i18n.gettext('Cobrowsing session is opened in a separate tab.') + " " +
                 Surfly.i18n.gettext('Please do not close this window while it is active.'),
         """
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn('msgid "Cobrowsing session is opened in a separate tab."', result)
         self.assertIn('msgid "Please do not close this window while it is active."', result)
 
@@ -58,7 +69,7 @@ class TestInput(unittest.TestCase):
                 gettext("Lonely")
                 gettext("Warrior")
         """
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn('msgid "Warrior"', result)
         self.assertIn('msgid "Lonely"', result)
 
@@ -66,7 +77,7 @@ class TestInput(unittest.TestCase):
         data = """
                 :aria-label="open.publishing ? $gettext('Leave videochat') : $gettext('Join videochat')">
         """
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn('msgid "Leave videochat"', result)
         self.assertIn('msgid "Join videochat"', result)
 
@@ -78,7 +89,7 @@ class TestInput(unittest.TestCase):
         return msg;
                 }
         """
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn(
             'msgid "You have an active cobrowsing session, are you sure you want to close this window?"', result
         )
@@ -86,13 +97,13 @@ class TestInput(unittest.TestCase):
     def test_space(self):
         data = """gettext("Warrior")"""
         expected = 'msgid "Warrior"'
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn(expected, result)
 
     def test_utf(self):
         data = """gettext("банана")"""
         expected = 'msgid "банана"'
-        result = generate_po(data, self.path)
+        result = self.generate_po(data, self.path)
         self.assertIn(expected, result)
 
 
@@ -133,36 +144,8 @@ class TestOccurrences(unittest.TestCase):
         self.assertEqual(expected, result)
 
 
-@contextlib.contextmanager
-def tmpfile(contents=None):
-    try:
-        with tempfile.NamedTemporaryFile('w', delete=False) as f:
-            filepath = f.name
-            if contents is not None:
-                f.write(contents)
-        yield filepath
-    finally:
-        os.remove(filepath)
-
-
-@contextlib.contextmanager
-def tmpdir():
-    try:
-        dirname = tempfile.mkdtemp()
-        yield dirname
-    finally:
-        shutil.rmtree(dirname)
-
-
 class TestFilesystem(unittest.TestCase):
 
-    class Args(object):
-        def __init__(self, output, prune=False):
-            self.output = output
-            self.prune = prune
-            self.version = 'test'
-            self.language = 'xx'
-
     def assertContents(self, expected, result):
         # get the PO file after the header
         _, _, result = result.partition("\n\n")
@@ -188,7 +171,7 @@ class TestFilesystem(unittest.TestCase):
             expected = expected.format(sourcepath=sourcepath)
             with tmpdir() as outpath:
                 outpath = os.path.join(outpath, 'xx.po')
-                update_po([sourcepath], self.Args(outpath, prune=True))
+                update_po([sourcepath], Args(outpath, prune=True))
                 with open(outpath, 'r') as f:
                     result = f.read()
 
@@ -208,7 +191,7 @@ class TestFilesystem(unittest.TestCase):
         with tmpfile(source) as sourcepath:
             expected = expected.format(sourcepath=sourcepath)
             with tmpfile(old_po) as popath:
-                update_po([sourcepath], self.Args(popath, prune=True))
+                update_po([sourcepath], Args(popath, prune=True))
                 with open(popath, 'r') as f:
                     result = f.read()
 
@@ -237,7 +220,7 @@ class TestFilesystem(unittest.TestCase):
         with tmpfile(source) as sourcepath:
             expected = expected.format(sourcepath=sourcepath)
             with tmpfile(old_po) as popath:
-                update_po([sourcepath], self.Args(popath, prune=True))
+                update_po([sourcepath], Args(popath, prune=True))
                 with open(popath, 'r') as f:
                     result = f.read()
 
@@ -265,7 +248,7 @@ class TestFilesystem(unittest.TestCase):
         with tmpfile(source) as sourcepath:
             expected = expected.format(sourcepath=sourcepath)
             with tmpfile(old_po) as popath:
-                update_po([sourcepath], self.Args(popath, prune=True))
+                update_po([sourcepath], Args(popath, prune=True))
                 with open(popath, 'r') as f:
                     result = f.read()
 
@@ -320,7 +303,7 @@ class TestFilesystem(unittest.TestCase):
                 f.write(old_po)
 
             # update PO file using new source files
-            update_po(spaths, self.Args(popath))
+            update_po(spaths, Args(popath))
 
             # check PO output
             with open(popath, 'r') as f:
@@ -373,13 +356,224 @@ class TestFilesystem(unittest.TestCase):
                 f.write(old_po)
 
             # update PO file using new source files
-            update_po(spaths, self.Args(popath, prune=True))
+            update_po(spaths, Args(popath, prune=True))
 
             # check PO output
             with open(popath, 'r') as f:
                 result = f.read()
             self.assertContents(expected, result)
 
+    def test_multifile_jobs(self):
+        sources = [
+            "gettext('shared'); gettext('test%d');" % i for i in range(40)
+        ]
+
+        with tmpdir() as dpath:
+            spaths = [os.path.join(dpath, "%d.js" % i) for i, _ in enumerate(sources)]
+            for source, spath in zip(sources, spaths):
+                with open(spath, 'w') as f:
+                    f.write(source)
+
+            results = []
+            for jobs in (1, 3):
+                popath = os.path.join(dpath, '%d.po' % jobs)
+                update_po(spaths, Args(popath, jobs=jobs))
+                with open(popath, 'r') as f:
+                    results.append(f.read().partition("\n\n")[2])
+
+        self.assertEqual(results[0], results[1])
+
+    def test_directory(self):
+        names = ['a.js', 'b.vue', 'c.png', 'node_modules/d.js', 'sub/e.js', 'sub/vendor/f.js']
+
+        with tmpdir() as dpath:
+            for name in names:
+                path = os.path.join(dpath, name)
+                if not os.path.isdir(os.path.dirname(path)):
+                    os.makedirs(os.path.dirname(path))
+                with open(path, 'w') as f:
+                    f.write("gettext('%s');" % name)
+
+            paths = iter_paths(
+                [dpath, os.path.join(dpath, 'c.png')],
+                include=['*.js', '*.vue'],
+                exclude=['node_modules', 'sub/vendor'],
+            )
+            result = [os.path.relpath(path, dpath) for path in paths]
+
+        self.assertEqual(['a.js', 'b.vue', 'sub/e.js', 'c.png'], result)
+
+    def test_scanners(self):
+        source = '''gettext('банана'); gettext("Warrior")\r
+            var a = gottext("banana");\r
+            \r
+            gettext('H"O"T') + gettext('last')'''
+
+        with tmpfile() as path:
+            with open(path, 'wb') as f:
+                f.write(source.encode('utf8'))
+            expected = (path, [('банана', 1), ('Warrior', 1), ('H"O"T', 4), ('last', 4)])
+            for scanner in ('line', 'mmap'):
+                self.assertEqual(expected, scan_file(path, DEFAULT_SCAN_OPTIONS._replace(scanner=scanner)))
+
+        with tmpfile('') as path:
+            self.assertEqual((path, []), scan_file(path, DEFAULT_SCAN_OPTIONS._replace(scanner='mmap')))
+
+    @mock.patch('lxgettext.lxgettext.CHUNK_SIZE', 7)
+    def test_chunked(self):
+        data = "x = gettext('first') + 'gettext(\"split\")';\n  gettext('line 2');\ngettext('a" + "b" * 5000 + "');"
+        expected = [('first', '1:5'), ('split', '1:25'), ('line 2', '2:3')]
+        self.assertEqual(expected, list(get_msgids_chunked(io.StringIO(data))))
+
+        data = "".join("%s gettext('%d');\n" % ("~" * (i % 97), i) for i in range(500))
+        expected = [(msgid, "%s:%s" % (i, len(line) - len(line.lstrip("~")) + 2))
+                    for (msgid, i), line in zip(get_msgids(data.split('\n')), data.split('\n'))]
+        self.assertEqual(expected, list(get_msgids_chunked(io.StringIO(data))))
+
+    def test_long_lines(self):
+        source = "gettext('short');\n" + "var x;" * 100 + "gettext('minified');"
+        options = DEFAULT_SCAN_OPTIONS._replace(max_line_length=100)
+
+        with tmpfile(source) as path:
+            # off by default
+            self.assertEqual((path, [('short', 1), ('minified', 2)]), scan_file(path))
+            self.assertEqual((path, [('short', '1:1'), ('minified', '2:601')]), scan_file(path, options))
+            options = options._replace(max_line_length=1000)
+            self.assertEqual((path, [('short', 1), ('minified', 2)]), scan_file(path, options))
+
+    def test_file_timeout(self):
+        source = "gettext('short');\n" + "var x;" * 1000 + "gettext('minified');"
+        options = DEFAULT_SCAN_OPTIONS._replace(file_timeout=60)
+
+        with tmpfile(source) as path:
+            # the time to match a line is bounded by scanning long ones in chunks
+            for scanner in ('line', 'mmap'):
+                self.assertEqual((path, [('short', '1:1'), ('minified', '2:6001')]),
+                                 scan_file(path, options._replace(scanner=scanner)))
+            for changes in ({'scanner': 'line'}, {'scanner': 'mmap'}, {'scanner': 'chunked'},
+                            {'parser': 'tokenizer'}):
+                with mock.patch('time.monotonic', side_effect=itertools.count(0, 100)), \
+                        mock.patch('sys.stderr'):
+                    self.assertEqual((path, None), scan_file(path, options._replace(**changes)))
+
+    def test_files_from(self):
+        with tmpfile('a.js\nb c.js\n\nd.vue') as path:
+            self.assertEqual(['a.js', 'b c.js', 'd.vue'], list(read_path_list(path)))
+        with tmpfile('a.js\0b\nc.js\0') as path:
+            self.assertEqual(['a.js', 'b\nc.js'], list(read_path_list(path, null=True)))
+
+    def test_locale_dir(self):
+        old_po = '''
+            #: oldsource:100
+            msgid "test"
+            msgstr "%s"
+        '''
+        expected = '''
+            #: {sourcepath}:2
+            msgid "test"
+            msgstr "%s"
+
+            #: {sourcepath}:3
+            msgid "new"
+            msgstr ""
+        '''
+        source = '''
+            gettext('test');
+            gettext('new');
+        '''
+
+        with tmpfile(source) as sourcepath, tmpdir() as dpath:
+            expected = expected.format(sourcepath=sourcepath)
+            for language in ('nl', 'de'):
+                os.makedirs(os.path.join(dpath, language))
+                with open(os.path.join(dpath, language, 'django.po'), 'w') as f:
+                    f.write(old_po % language)
+
+            for jobs, languages in ((1, False), (2, 'nl,de,fr')):
+                update_po([sourcepath], Args(
+                    None, locale_dir=dpath, path_template='{lang}/django.po', languages=languages, jobs=jobs,
+                ))
+                for language, translation in (('nl', 'nl'), ('de', 'de'), ('fr', '')):
+                    path = os.path.join(dpath, language, 'django.po')
+                    if language == 'fr' and not languages:
+                        self.assertFalse(os.path.exists(path))
+                        continue
+                    with open(path, 'r') as f:
+                        result = f.read()
+                    self.assertIn('"Language: %s\\n"' % language, result)
+                    self.assertContents(expected % translation, result)
+
+    def test_sorting(self):
+        old_po = '''
+            #: oldsource:100
+            msgid "old"
+            msgstr "dlo"
+        '''
+        sources = [
+            "gettext('b');\n" * 10 + "gettext('c');",
+            "gettext('a');\ngettext('b');",
+        ]
+        expected = {
+            'first_seen': ['old', 'b', 'c', 'a'],
+            'sort_output': ['a', 'b', 'c', 'old'],
+            'sort_by_file': ['b', 'c', 'a', 'old'],
+        }
+
+        with tmpdir() as dpath:
+            spaths = [os.path.join(dpath, "%d.js" % i) for i, _ in enumerate(sources)]
+            for source, spath in zip(sources, spaths):
+                with open(spath, 'w') as f:
+                    f.write(source)
+
+            for order, msgids in expected.items():
+                popath = os.path.join(dpath, '%s.po' % order)
+                with open(popath, 'w') as f:
+                    f.write(old_po)
+                update_po(spaths, Args(popath, **{order: True}))
+                with open(popath, 'r') as f:
+                    result = f.read()
+                self.assertEqual(msgids, re.findall('msgid "(.+)"', result))
+
+            occurrences = [(spaths[0], str(i)) for i in range(1, 11)] + [(spaths[1], '2')]
+            self.assertEqual(occurrences, polib.pofile(popath).find('b').occurrences)
+
+    def test_skip_unchanged(self):
+        with tmpfile("gettext('test');") as sourcepath, tmpdir() as dpath:
+            popath = os.path.join(dpath, 'xx.po')
+            [result] = update_po([sourcepath], Args(popath, skip_unchanged=True))
+            self.assertTrue(result.changed)
+            os.utime(popath, (1000, 1000))
+
+            with mock.patch('lxgettext.lxgettext.now', '2000-01-01 00:00:00'):
+                [result] = update_po([sourcepath], Args(popath, skip_unchanged=True))
+            self.assertFalse(result.changed)
+            self.assertEqual(1000, os.path.getmtime(popath))
+
+            with open(sourcepath, 'a') as f:
+                f.write("gettext('other');")
+            [result] = update_po([sourcepath], Args(popath, skip_unchanged=True))
+            self.assertEqual((1, 1, 2, True), result[1:5])
+            self.assertNotEqual(1000, os.path.getmtime(popath))
+
+    def test_number_of_entries(self):
+        header = 'msgid ""\nmsgstr ""\n"Language: xx\\n"\n\n'
+        entries = '''#: a.js:1
+msgid ""
+"wrapped "
+"msgid"
+msgstr ""
+
+msgctxt "context"
+msgid "test"
+msgstr "tset"
+
+#~ msgid "obsolete"
+#~ msgstr "etelosbo"
+'''
+        for contents in (header + entries, entries, header, ''):
+            with tmpfile(contents) as path:
+                self.assertEqual(len(polib.pofile(path)), get_number_of_entries(path))
+
     def test_existing_prune_all(self):
         old_po = '''
             #: oldsource:2
@@ -390,7 +584,7 @@ class TestFilesystem(unittest.TestCase):
         expected = ''
 
         with tmpfile(old_po) as path:
-            update_po(source, self.Args(path, prune=True))
+            update_po(source, Args(path, prune=True))
             with open(path, 'r') as f:
                 result = f.read()
 
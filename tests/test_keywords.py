@@ -0,0 +1,112 @@
+import io
+import os
+import unittest
+
+from lxgettext.keywords import KeywordSpec, join_msgid, parse_keyword, split_msgid
+from lxgettext.lxgettext import DEFAULT_SCAN_OPTIONS, generate_po, scan_file, update_po
+from lxgettext.tokenizer import get_msgids_tokenized
+
+from . import test_input
+from .helpers import Args, tmpdir
+
+KEYWORDS = ('gettext', 'ngettext:1,2', 'pgettext:1c,2', 'npgettext:1c,2,3')
+
+SOURCE = """gettext('a');
+ngettext('one', 'many', n); pgettext( "menu" ,'Open')
+npgettext('c', 'x', 'xs', n) + $gettext('d') + ngettext('single')
+"""
+
+EXPECTED = [
+    ('a', 1),
+    (join_msgid('one', 'many'), 2),
+    (join_msgid('Open', msgctxt='menu'), 2),
+    (join_msgid('x', 'xs', 'c'), 3),
+    ('d', 3),
+    ('single', 3),
+]
+
+
+class TestKeywords(unittest.TestCase):
+
+    def test_parse_keyword(self):
+        self.assertEqual(KeywordSpec('gettext', 1, None, None), parse_keyword('gettext'))
+        self.assertEqual(KeywordSpec('ngettext', 1, 2, None), parse_keyword('ngettext:1,2'))
+        self.assertEqual(KeywordSpec('npgettext', 2, 3, 1), parse_keyword('npgettext:1c,2,3'))
+        self.assertEqual(KeywordSpec('$t', 2, None, None), parse_keyword('$t:2'))
+        for spec in ('', 'a b', 'x:1,2,3', 'x:1c', 'x:1,1', 'x:0', 'x:1c,2c,3', 'x:a'):
+            with self.assertRaises(ValueError):
+                parse_keyword(spec)
+
+    def test_split_msgid(self):
+        self.assertEqual((None, 'a', None), split_msgid('a'))
+        self.assertEqual(('c', 'x', 'xs'), split_msgid(join_msgid('x', 'xs', 'c')))
+
+    def test_scanners(self):
+        with tmpdir() as dpath:
+            path = os.path.join(dpath, 'source.js')
+            with io.open(path, 'w', encoding='utf8') as f:
+                f.write(SOURCE)
+            for scanner in ('line', 'mmap'):
+                options = DEFAULT_SCAN_OPTIONS._replace(scanner=scanner, keywords=KEYWORDS)
+                self.assertEqual((path, EXPECTED), scan_file(path, options))
+            options = DEFAULT_SCAN_OPTIONS._replace(scanner='chunked', keywords=KEYWORDS)
+            self.assertEqual(
+                [match for match, _ in EXPECTED],
+                [match for match, _ in scan_file(path, options)[1]],
+            )
+
+    def test_tokenizer(self):
+        self.assertEqual(EXPECTED[:-1], list(get_msgids_tokenized(SOURCE, KEYWORDS)))
+
+    def test_generate_po(self):
+        result = generate_po(SOURCE, 'source.js', DEFAULT_SCAN_OPTIONS._replace(keywords=KEYWORDS))
+        self.assertIn('#: source.js:2\nmsgid "one"\nmsgid_plural "many"\nmsgstr[0] ""\nmsgstr[1] ""\n', result)
+        self.assertIn('#: source.js:3\nmsgctxt "c"\nmsgid "x"\nmsgid_plural "xs"\n', result)
+
+    def test_update_po(self):
+        old_po = '''
+            msgid "one"
+            msgstr "een"
+
+            msgctxt "menu"
+            msgid "Open"
+            msgstr "Openen"
+        '''
+        source = '''
+            pgettext('menu', 'Open'); gettext('Open');
+            gettext('one'); ngettext('one', 'many', n);
+        '''
+        expected = '''
+            #: {sourcepath}:2
+            msgctxt "menu"
+            msgid "Open"
+            msgstr "Openen"
+
+            #: {sourcepath}:2
+            msgid "Open"
+            msgstr ""
+
+            #: {sourcepath}:3
+            msgid "one"
+            msgid_plural "many"
+            msgstr[0] "een"
+            msgstr[1] ""
+        '''
+        with tmpdir() as dpath:
+            sourcepath = os.path.join(dpath, 'source.js')
+            with open(sourcepath, 'w') as f:
+                f.write(source)
+            popath = os.path.join(dpath, 'xx.po')
+            with open(popath, 'w') as f:
+                f.write(old_po)
+            args = Args(popath, prune=True, keywords=KEYWORDS)
+            results = update_po([sourcepath], args)
+            self.assertEqual((1, 2, 3), (results[0].new_entries, results[0].entries_before, results[0].entries_after))
+            with open(popath, 'r') as f:
+                result = f.read()
+
+        test_input.TestFilesystem.assertContents(self, expected.format(sourcepath=sourcepath), result)
+
+
+if __name__ == '__main__':
+    unittest.main()
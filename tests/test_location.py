@@ -0,0 +1,71 @@
+import os
+import unittest
+
+from lxgettext.lxgettext import generate_po, get_locations, update_po
+
+from .helpers import Args, tmpdir
+
+SOURCE = '''
+    gettext('a'); gettext('b');
+    gettext('a');
+'''
+
+
+class TestLocation(unittest.TestCase):
+
+    def update_po(self, sources, **options):
+        cwd = os.getcwd()
+        with tmpdir() as dpath:
+            # relative paths, to keep the occurrence lines short
+            os.chdir(dpath)
+            try:
+                for name, source in sources:
+                    with open(name, 'w') as f:
+                        f.write(source)
+                update_po([name for name, _ in sources], Args('xx.po', **options))
+                with open('xx.po', 'r') as f:
+                    result = f.read()
+            finally:
+                os.chdir(cwd)
+        return result.partition("\n\n")[2]
+
+    def test_get_locations(self):
+        occurrences = [('a.js', 1), ('a.js', '2:5'), ('b.js', 1)]
+        self.assertEqual(occurrences, get_locations(occurrences))
+        self.assertEqual([('a.js', ''), ('b.js', '')], get_locations(occurrences, 'file'))
+        self.assertEqual([], get_locations(occurrences, 'never', 1))
+        self.assertEqual(occurrences[:2], get_locations(occurrences, max_occurrences=2))
+        self.assertEqual([('a.js', '')], get_locations(occurrences, 'file', 1))
+
+    def test_add_location(self):
+        sources = [('b.js', SOURCE), ('a.js', SOURCE)]
+        self.assertEqual(
+            '#: a.js:2 a.js:3 b.js:2 b.js:3\nmsgid "a"\nmsgstr ""\n\n#: a.js:2 b.js:2\nmsgid "b"\nmsgstr ""\n',
+            self.update_po(sources))
+        self.assertEqual(
+            '#: a.js b.js\nmsgid "a"\nmsgstr ""\n\n#: a.js b.js\nmsgid "b"\nmsgstr ""\n',
+            self.update_po(sources, add_location='file'))
+        self.assertEqual(
+            'msgid "a"\nmsgstr ""\n\nmsgid "b"\nmsgstr ""\n',
+            self.update_po(sources, add_location='never'))
+        self.assertEqual(
+            '#: a.js:2\nmsgid "a"\nmsgstr ""\n\n#: a.js:2\nmsgid "b"\nmsgstr ""\n',
+            self.update_po(sources, max_occurrences=1))
+
+    def test_sort_by_file(self):
+        sources = [('b.js', "gettext('b');"), ('a.js', "gettext('a');")]
+        self.assertEqual(
+            'msgid "a"\nmsgstr ""\n\nmsgid "b"\nmsgstr ""\n',
+            self.update_po(sources, add_location='never', sort_by_file=True))
+
+    def test_generate_po(self):
+        self.assertEqual(
+            '#: a.js\nmsgid "a"\nmsgstr ""\n\n#: a.js\nmsgid "b"\nmsgstr ""\n',
+            generate_po(SOURCE, 'a.js', add_location='file'))
+        self.assertEqual(
+            'msgid "a"\nmsgstr ""\n',
+            generate_po("gettext('a');", 'a.js', add_location='never'))
+
+
+if __name__ == '__main__':
+    unittest.main()
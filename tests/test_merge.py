@@ -0,0 +1,69 @@
+import os
+import unittest
+
+from lxgettext.lxgettext import PO_BACKENDS, update_po
+from lxgettext.merge import merge_pofiles
+
+from .helpers import Args, tmpdir
+
+
+class TestMerge(unittest.TestCase):
+
+    def test_merge(self):
+        source = '''
+            gettext('kept');
+            gettext('new');
+        '''
+        old_po = '''
+            #: oldsource:1
+            msgid "kept"
+            msgstr "translated"
+
+            #: oldsource:2
+            msgid "removed"
+            msgstr "gone"
+        '''
+        expected = '''
+            #: {sourcepath}:2
+            msgid "kept"
+            msgstr "translated"
+
+            #: {sourcepath}:3
+            msgid "new"
+            msgstr ""
+
+            #~ msgid "removed"
+            #~ msgstr "gone"
+        '''
+
+        with tmpdir() as dpath:
+            sourcepath = os.path.join(dpath, 'source.js')
+            with open(sourcepath, 'w') as f:
+                f.write(source)
+            potpath = os.path.join(dpath, 'messages.pot')
+            update_po([sourcepath], Args(potpath, pot=True))
+
+            with open(potpath, 'r') as f:
+                pot = f.read()
+            self.assertIn('"Language: \\n"', pot)
+            self.assertIn('#: {sourcepath}:3\nmsgid "new"\nmsgstr ""\n'.format(sourcepath=sourcepath), pot)
+
+            popath = os.path.join(dpath, 'nl.po')
+            lines = expected.format(sourcepath=sourcepath).strip().split('\n')
+            for po_backend in PO_BACKENDS:
+                for jobs in (1, 2):
+                    with self.subTest(po_backend=po_backend, jobs=jobs):
+                        with open(popath, 'w') as f:
+                            f.write(old_po)
+
+                        results = list(merge_pofiles(potpath, [popath], jobs, po_backend))
+                        self.assertEqual([(popath, 1, 1)], results)
+
+                        with open(popath, 'r') as f:
+                            result = f.read()
+                        _, _, result = result.partition("\n\n")
+                        self.assertEqual(''.join(line.lstrip() + '\n' for line in lines), result)
+
+
+if __name__ == '__main__':
+    unittest.main()
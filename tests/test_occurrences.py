@@ -0,0 +1,62 @@
+import pickle
+import unittest
+
+from lxgettext.occurrences import Occurrences, format_lineno, parse_lineno
+
+
+class TestOccurrences(unittest.TestCase):
+
+    def test_parse_lineno(self):
+        self.assertEqual((12, 0), parse_lineno(12))
+        self.assertEqual((12, 0), parse_lineno('12'))
+        self.assertEqual((12, 5), parse_lineno('12:5'))
+        self.assertEqual((12, 0), parse_lineno('12:x'))
+        for lineno in ('', None, 'abc', '-1', ':5'):
+            self.assertEqual((0, 0), parse_lineno(lineno))
+        self.assertEqual('', format_lineno(0, 0))
+        self.assertEqual(12, format_lineno(12, 0))
+
+    def test_missing_lineno(self):
+        occurrences = Occurrences()
+        occurrences.add_file('a.js', [('x', ''), ('x', '3'), ('x', 'abc')])
+        self.assertEqual([('x', [('a.js', ''), ('a.js', 3)])], list(occurrences.items()))
+
+    def test_add_file(self):
+        occurrences = Occurrences()
+        occurrences.add_file('b.js', [('x', 3), ('y', '1:20'), ('x', 3), ('x', 1)])
+        occurrences.add_file('a.js', [('x', 7), ('y', '1:5')])
+        occurrences.add('z', 'a.js', '2')
+
+        self.assertEqual(['x', 'y', 'z'], list(occurrences))
+        self.assertEqual(3, len(occurrences))
+        self.assertEqual(['a.js', 'b.js'], sorted(occurrences.paths))
+        self.assertEqual([
+            ('x', [('a.js', 7), ('b.js', 1), ('b.js', 3)]),
+            ('y', [('a.js', '1:5'), ('b.js', '1:20')]),
+            ('z', [('a.js', 2)]),
+        ], list(occurrences.items()))
+        self.assertEqual(list(occurrences.items()), list(pickle.loads(pickle.dumps(occurrences)).items()))
+
+    def test_remove_file(self):
+        occurrences = Occurrences()
+        occurrences.add_file('a.js', [('x', 1), ('y', 2)])
+        occurrences.add_file('b.js', [('x', 1)])
+        occurrences.remove_file('a.js', ['x', 'y', 'x'])
+        occurrences.remove_file('c.js', ['x'])
+        self.assertEqual([('x', [('b.js', 1)])], list(occurrences.items()))
+
+    def test_update(self):
+        occurrences = Occurrences()
+        occurrences.add_file('a.js', [('x', 1)])
+        other = Occurrences()
+        other.add_file('b.js', [('y', 2)])
+        other.add_file('a.js', [('x', 1), ('x', 5)])
+        occurrences.update(other)
+        self.assertEqual([
+            ('x', [('a.js', 1), ('a.js', 5)]),
+            ('y', [('b.js', 2)]),
+        ], list(occurrences.items()))
+
+
+if __name__ == '__main__':
+    unittest.main()
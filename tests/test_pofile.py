@@ -0,0 +1,138 @@
+# coding: utf8
+import io
+import os
+import unittest
+
+import polib
+
+from lxgettext import pofile
+from lxgettext.lxgettext import update_po
+
+from .helpers import Args, tmpdir
+
+PO_FILE = '''\
+# Translations of the test project
+#, fuzzy
+msgid ""
+msgstr ""
+"Project-Id-Version: 1.0\\n"
+"X-Custom: a value that is long enough to be continued on another line\\n"
+"Content-Type: text/plain; charset=utf-8\\n"
+"Language: nl\\n"
+
+# translator comment
+#. extracted comment
+#.   indented extracted comment
+#: src/app.js:1 src/some-long-directory-name/with-hyphens/component.vue:120 src/other.js:3
+#: README
+#, fuzzy, python-format
+#| msgid "Old"
+msgid "Welcome back, \\"%s\\"! This message is long enough to be wrapped by the writer."
+msgstr "Welkom terug, \\"%s\\"!\\tTab\\\\"
+
+msgctxt "menu"
+msgid "Open"
+msgid_plural "Open all"
+msgstr[0] "Openen"
+msgstr[1] ""
+
+msgid "multi"
+"line\\n"
+"string"
+msgstr "meerdere\\n"
+"regels"
+
+#~ msgid "removed"
+#~ msgstr "verwijderd"
+'''
+
+
+class TestPOFile(unittest.TestCase):
+
+    def write(self, dpath, contents):
+        path = os.path.join(dpath, 'messages.po')
+        with io.open(path, 'w', encoding='utf8') as f:
+            f.write(contents)
+        return path
+
+    def test_same_as_polib(self):
+        with tmpdir() as dpath:
+            path = self.write(dpath, PO_FILE)
+            expected = polib.pofile(path)
+            po = pofile.pofile(path)
+
+            self.assertEqual(expected.__unicode__(), po.__unicode__())
+            self.assertEqual(expected.header, po.header)
+            self.assertEqual(expected.metadata, po.metadata)
+            self.assertEqual(expected.metadata_is_fuzzy, po.metadata_is_fuzzy)
+            self.assertEqual(len(expected), len(po))
+            for expected_entry, entry in zip(expected, po):
+                for field in ('msgid', 'msgstr', 'msgid_plural', 'msgstr_plural',
+                              'msgctxt', 'obsolete', 'comment', 'tcomment',
+                              'occurrences', 'flags', 'previous_msgid'):
+                    self.assertEqual(getattr(expected_entry, field), getattr(entry, field))
+                self.assertEqual(expected_entry.translated(), entry.translated())
+
+            po.save(path + '.out')
+            expected.save(path + '.expected')
+            with open(path + '.out', 'rb') as out, open(path + '.expected', 'rb') as f:
+                self.assertEqual(f.read(), out.read())
+
+    def test_new_file(self):
+        expected = polib.POFile()
+        po = pofile.POFile()
+        for catalog, module in ((expected, polib), (po, pofile)):
+            catalog.metadata.update({"Language": "nl", "Content-Type": "text/plain; charset=utf-8"})
+            catalog.append(module.POEntry(msgid="a", msgstr="", occurrences=[("a.js", 1), ("b.js", "2:5")]))
+        self.assertEqual(expected.__unicode__(), po.__unicode__())
+
+    def test_merge(self):
+        with tmpdir() as dpath:
+            path = self.write(dpath, PO_FILE)
+            template = os.path.join(dpath, 'messages.pot')
+            with io.open(template, 'w', encoding='utf8') as f:
+                f.write('#: b.js:2\nmsgid "multi\\nline\\nstring"\nmsgstr ""\n\nmsgid "new"\nmsgstr ""\n')
+
+            expected = polib.pofile(path)
+            expected.merge(polib.pofile(template))
+            po = pofile.pofile(path)
+            po.merge(pofile.pofile(template))
+            self.assertEqual(expected.__unicode__(), po.__unicode__())
+
+    def test_backends(self):
+        with tmpdir() as dpath:
+            spath = os.path.join(dpath, 'a.js')
+            with open(spath, 'w') as f:
+                f.write("gettext('new'); gettext('Welcome back');")
+            contents = {}
+            for backend in ('native', 'polib'):
+                path = self.write(dpath, PO_FILE)
+                update_po([spath], Args(path, po_backend=backend))
+                with open(path, 'rb') as f:
+                    contents[backend] = f.read()
+            self.assertEqual(contents['polib'], contents['native'])
+
+    def test_encodings(self):
+        with tmpdir() as dpath:
+            for contents, encoding in (
+                    ('\ufeff' + PO_FILE.replace('\n', '\r\n'), 'utf8'),
+                    (PO_FILE.replace('charset=utf-8', 'charset=latin-1').replace('Welkom', 'Wélkom'), 'latin-1'),
+                    ('', 'utf8')):
+                path = os.path.join(dpath, 'messages.po')
+                with io.open(path, 'w', encoding=encoding, newline='') as f:
+                    f.write(contents)
+                expected = polib.pofile(path)
+                po = pofile.pofile(path)
+                self.assertEqual(expected.encoding, po.encoding)
+                self.assertEqual(expected.header, po.header)
+                self.assertEqual(expected.__unicode__(), po.__unicode__())
+
+    def test_syntax_error(self):
+        with tmpdir() as dpath:
+            path = self.write(dpath, 'msgid "a"\nmsgstr "b"c"\n')
+            with self.assertRaises(IOError):
+                pofile.pofile(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import shutil
+import subprocess
+import unittest
+
+from lxgettext.lxgettext import filter_paths, update_po, with_defaults
+
+from .helpers import Args, TmpdirTestCase
+
+
+@unittest.skipIf(shutil.which('git') is None, 'git is not installed')
+class TestSince(TmpdirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.dpath)
+        os.mkdir('src')
+        self.git('init', '-q')
+        self.write('src/a.js', "gettext('a');\ngettext('shared');")
+        self.write('src/b.js', "gettext('b');\ngettext('shared');")
+        self.write('src/c.js', "gettext('c');")
+        self.write('src/skip.txt', "gettext('skip');")
+        self.git('add', 'src')
+        self.git('-c', 'user.name=test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', 'sources')
+
+    def git(self, *args):
+        subprocess.check_call(('git',) + args)
+
+    def write(self, path, contents):
+        with open(path, 'w') as f:
+            f.write(contents)
+
+    def update(self, output, **options):
+        args = with_defaults(Args(output, include=['*.js'], **options))
+        [result] = update_po(['src/'], args)
+        with open(output) as f:
+            return result, f.read()
+
+    def entries(self, contents):
+        return sorted(entry.strip() for entry in contents.split('\n\n')[1:])
+
+    def test_since(self):
+        for prune in (False, True):
+            self.update('since.po', prune=prune)
+            shutil.copyfile('since.po', 'full.po')
+            self.git('mv', 'src/c.js', 'src/renamed.js')
+            self.write('src/a.js', "gettext('new');\n\ngettext('shared');")
+            os.remove('src/b.js')
+            self.write('src/d.js', "gettext('d');")
+            self.write('src/skip.txt', "gettext('new skip');")
+
+            result, since = self.update('since.po', prune=prune, since='HEAD')
+            full_result, full = self.update('full.po', prune=prune)
+            if prune:
+                # entries found in the unchanged files keep their place
+                self.assertEqual(self.entries(full), self.entries(since))
+            else:
+                self.assertEqual(full, since)
+            self.assertEqual(full_result.extracted, result.extracted)
+            self.assertIn('src/renamed.js:1', since)
+            self.assertNotIn('src/b.js', since)
+            self.assertEqual(prune, 'msgid "b"' not in since)
+
+            self.git('reset', '-q', '--hard')
+            self.git('clean', '-q', '-f')
+
+    def test_since_without_line_numbers(self):
+        self.update('since.po', add_location='file')
+        self.write('src/a.js', "gettext('new');\n\ngettext('shared');")
+
+        result, since = self.update('since.po', since='HEAD')
+        self.assertIn('#: src/b.js\nmsgid "b"', since)
+        self.assertIn('#: src/a.js:3 src/b.js\nmsgid "shared"', since)
+        self.assertIn('#: src/a.js:1\nmsgid "new"', since)
+        self.assertNotIn('#: src/a.js\n', since)
+
+    def test_since_with_columns(self):
+        # the chunked scanner writes path:line:column occurrences
+        for prune in (False, True):
+            self.update('since.po', prune=prune, scanner='chunked')
+            self.write('src/a.js', "gettext('a');")
+            result, since = self.update('since.po', prune=prune, scanner='chunked', since='HEAD')
+            self.assertIn('#: src/a.js:1:1\nmsgid "a"', since)
+            self.assertIn('#: src/b.js:2:1\nmsgid "shared"', since)
+            self.assertNotIn('src/a.js:2:1', since)
+
+            self.git('reset', '-q', '--hard')
+
+    def test_filter_paths(self):
+        files = ['src/a.js', 'src/lib/b.js', 'src/node_modules/c.js', 'src/d.txt', 'other/e.js', 'f.js']
+        self.assertEqual(
+            ['src/a.js', 'src/lib/b.js', 'f.js'],
+            list(filter_paths(files, ['src/', 'f.js'], include=['*.js'], exclude=['node_modules'])))
+        self.assertEqual(['./src/a.js'], list(filter_paths(['src/a.js'], ['.'], exclude=['lib'])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+from lxgettext import lxgettext
+from lxgettext.lxgettext import (
+    DEFAULT_SCAN_OPTIONS, SkippedFile, read_source, scan_file, scan_file_measured, sniff, update_po)
+
+from .helpers import Args, TmpdirTestCase
+
+
+class TestSniff(TmpdirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.paths = {}
+        for name, data in (('a.js', b"gettext('a');\n"), ('image.png', b"\x89PNG\r\n\x1a\n\0\0gettext('x')"),
+                           ('latin.js', b"gettext('caf\xe9');\n"), ('empty.js', b'')):
+            self.paths[name] = os.path.join(self.dpath, name)
+            with open(self.paths[name], 'wb') as f:
+                f.write(data)
+
+    def scan_file(self, name, **options):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            _, matches = scan_file(self.paths[name], DEFAULT_SCAN_OPTIONS._replace(**options))
+        return matches, stderr.getvalue()
+
+    def test_sniff(self):
+        self.assertTrue(sniff(self.paths['a.js'], ('gettext',)))
+        self.assertFalse(sniff(self.paths['a.js'], ('ngettext',)))
+        self.assertFalse(sniff(self.paths['empty.js'], ('gettext',), max_file_size=1))
+        with self.assertRaisesRegex(SkippedFile, 'binary'):
+            sniff(self.paths['image.png'], ('gettext',))
+        with self.assertRaisesRegex(SkippedFile, 'larger than 10 bytes'):
+            sniff(self.paths['a.js'], max_file_size=10)
+
+    def test_scan_file(self):
+        self.assertEqual(([('a', 1)], ''), self.scan_file('a.js', max_file_size=100))
+        matches, stderr = self.scan_file('a.js', max_file_size=10)
+        self.assertIsNone(matches)
+        self.assertIn('skipped, larger than 10 bytes', stderr)
+        for scanner in ('line', 'mmap', 'chunked'):
+            matches, stderr = self.scan_file('image.png', scanner=scanner)
+            self.assertIsNone(matches)
+            self.assertIn('skipped, binary file', stderr)
+            matches, stderr = self.scan_file('latin.js', scanner=scanner)
+            self.assertIsNone(matches)
+            self.assertIn("can't decode", stderr)
+
+    def test_on_error(self):
+        self.assertEqual((None, ''), self.scan_file('latin.js', on_error='skip'))
+        self.assertEqual((None, ''), self.scan_file('image.png', on_error='skip'))
+        with self.assertRaises(UnicodeDecodeError):
+            self.scan_file('latin.js', on_error='fail')
+        # binary files are skipped even then
+        self.assertEqual(None, self.scan_file('image.png', on_error='fail')[0])
+        os.remove(self.paths['a.js'])
+        with self.assertRaises(OSError):
+            self.scan_file('a.js', on_error='fail')
+        self.assertIn('No such file', self.scan_file('a.js')[1])
+
+    def test_scan_file_measured(self):
+        for options in ({'scanner': 'line'}, {'scanner': 'mmap'}, {'scanner': 'chunked'}, {'parser': 'tokenizer'}):
+            options = DEFAULT_SCAN_OPTIONS._replace(on_error='skip', **options)
+            for name in sorted(self.paths):
+                with mock.patch('io.open', wraps=io.open) as open_:
+                    path, matches, file_stats = scan_file_measured(self.paths[name], options)
+                # read once, then scanned from memory
+                self.assertEqual(1, open_.call_count)
+                self.assertEqual(scan_file(self.paths[name], options), (path, matches))
+                self.assertEqual(name == 'empty.js', file_stats.prefiltered)
+        _, matches, file_stats = scan_file_measured(
+            self.paths['a.js'], DEFAULT_SCAN_OPTIONS._replace(max_file_size=10, on_error='skip'))
+        self.assertEqual((None, 0), (matches, file_stats.bytes))
+
+    def test_read_source(self):
+        self.assertEqual("gettext('a');\n", read_source(self.paths['a.js']))
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertIsNone(read_source(self.paths['latin.js']))
+
+    def test_update_po(self):
+        popath = os.path.join(self.dpath, 'xx.po')
+        with contextlib.redirect_stderr(io.StringIO()):
+            results = update_po(sorted(self.paths.values()), Args(popath))
+        self.assertEqual(1, results[0].extracted)
+
+    def test_run(self):
+        argv = ['lxgettext', '--no-cache', '--scanner', 'mmap', '-o', os.path.join(self.dpath, 'xx.po')]
+        stderr = io.StringIO()
+        with mock.patch.object(sys, 'argv', argv + sorted(self.paths.values())), mock.patch('sys.stdout'), \
+                mock.patch('lxgettext.lxgettext.scan_file_measured') as scan_file_measured, \
+                contextlib.redirect_stderr(stderr):
+            lxgettext.main()
+        # the files are only measured with --stats
+        scan_file_measured.assert_not_called()
+        self.assertTrue(stderr.getvalue().endswith('2 files skipped\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
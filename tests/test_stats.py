@@ -0,0 +1,66 @@
+import json
+import os
+import unittest
+
+from lxgettext.cache import ExtractionCache
+from lxgettext.lxgettext import update_po
+from lxgettext.stats import PHASES, FileStats, Stats
+
+from .helpers import Args, tmpdir
+
+
+class TestStats(unittest.TestCase):
+
+    def test_update_po(self):
+        with tmpdir() as dpath:
+            paths = []
+            for name, source in (('a.js', "gettext('a');\ngettext('b');\n"), ('b.js', "x = 1;")):
+                paths.append(os.path.join(dpath, name))
+                with open(paths[-1], 'w') as f:
+                    f.write(source)
+            popath = os.path.join(dpath, 'xx.po')
+            cache = ExtractionCache(dpath, 'sig')
+
+            stats = Stats(slowest=1)
+            update_po(paths, Args(popath), cache, stats)
+            self.assertEqual((2, 0, 0), (stats.files, stats.cached_files, stats.skipped_files))
+            # b.js has no keywords and is not scanned
+            self.assertEqual(1, stats.prefiltered_files)
+            self.assertEqual((34, 3, 2), (stats.bytes, stats.lines, stats.matches))
+            self.assertEqual(list(PHASES), list(stats.phases))
+            self.assertTrue(all(seconds > 0 for seconds in stats.phases.values()))
+
+            # cached files are not read or scanned
+            stats = Stats(slowest=1)
+            update_po(paths, Args(popath), cache, stats)
+            self.assertEqual((0, 2, 0), (stats.files, stats.cached_files, stats.bytes))
+            self.assertEqual(2, stats.matches)
+
+    def test_skipped(self):
+        stats = Stats()
+        # a file that couldn't be looked up in the cache
+        stats.add_file('a', None, None)
+        self.assertEqual((0, 0, 1), (stats.files, stats.cached_files, stats.skipped_files))
+
+    def test_save(self):
+        with tmpdir() as dpath:
+            stats = Stats(slowest=2)
+            for path, seconds in (('a', 1), ('b', 3), ('c', 2)):
+                stats.add_file(path, FileStats(10, 2, seconds, 0), 1)
+            # skipped while scanning, and cached
+            stats.add_file('d', FileStats(5, 1, 0, 0), None)
+            stats.add_file('e', None, 2)
+            stats.save(os.path.join(dpath, 'stats.json'))
+            with open(os.path.join(dpath, 'stats.json')) as f:
+                data = json.load(f)
+
+        self.assertEqual(['b', 'c'], [item['path'] for item in data['slowest_files']])
+        # the skipped file is not counted as scanned
+        self.assertEqual((3, 1, 1, 30, 5), (
+            data['files'], data['cached_files'], data['skipped_files'], data['bytes'], data['matches']))
+        self.assertEqual(3 / 6, data['files_per_second'])
+        self.assertEqual(6, data['phases']['read'])
+
+
+if __name__ == '__main__':
+    unittest.main()
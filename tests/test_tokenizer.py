@@ -0,0 +1,80 @@
+# coding: utf8
+# flake8: E501
+
+import unittest
+
+from lxgettext.lxgettext import DEFAULT_SCAN_OPTIONS, generate_po
+from lxgettext.tokenizer import get_msgids_tokenized
+
+from . import test_input
+
+
+class TestTokenizerInput(test_input.TestInput):
+    """Runs the TestInput cases through the tokenizer parser"""
+
+    def setUp(self):
+        self.path = "__init__.vue"
+
+    def generate_po(self, data, filename):
+        return generate_po(data, filename, DEFAULT_SCAN_OPTIONS._replace(parser='tokenizer'))
+
+
+class TestTokenizer(unittest.TestCase):
+
+    def extract(self, data, markup=False):
+        return list(get_msgids_tokenized(data, 'gettext', markup))
+
+    def test_comments(self):
+        data = '''
+            // gettext('line comment')
+            /* gettext('block
+               comment') */ gettext('code')
+        '''
+        self.assertEqual([('code', 4)], self.extract(data))
+
+    def test_escapes(self):
+        data = r'''gettext('it\'s'); gettext("say \"hi\"!"); gettext('a' + 'b');'''
+        self.assertEqual([("it's", 1), ('say "hi"!', 1)], self.extract(data))
+
+    def test_strings_and_regex(self):
+        data = '''
+            var s = "gettext('in a string')";
+            var r = /'/; gettext('after regex');
+            var d = a / b; gettext('after division');
+        '''
+        self.assertEqual([('after regex', 3), ('after division', 4)], self.extract(data))
+
+    def test_unterminated_regex(self):
+        # every slash would start a scan to the end of the line
+        data = "x = /[" * 20000 + "gettext('same line');\nvar r = /'/; gettext('next line');"
+        self.assertEqual([('same line', 1), ('next line', 2)], self.extract(data))
+
+    def test_template_literals(self):
+        data = '''
+            `text gettext('not a call') ${gettext('substitution')} ${ {a: 1}.a }`;
+            gettext(`literal`); gettext(`with ${value}`);
+        '''
+        self.assertEqual([('substitution', 2), ('literal', 3)], self.extract(data))
+
+    def test_keyword_boundary(self):
+        data = '''ngettext('plural'); gettextual('other'); this.$gettext('dollar')'''
+        self.assertEqual([('dollar', 1)], self.extract(data))
+
+    def test_vue(self):
+        data = '''<template>
+              <div :aria-label="open ? $gettext('Leave') : $gettext('Join')">
+              <!-- gettext('comment') -->
+              {{ $gettext("Don't") }}
+            </template>
+            <script>
+            export default { data() { return { s: "gettext('string')", m: this.$gettext('script') } } }
+            </script>
+        '''
+        self.assertEqual(
+            [('Leave', 2), ('Join', 2), ("Don't", 4), ('script', 7)],
+            self.extract(data, markup=True),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+
+import polib
+
+from lxgettext.lxgettext import with_defaults
+from lxgettext.watch import InotifyObserver, PollingObserver, Watcher
+
+from .helpers import Args, TmpdirTestCase
+
+
+class TestWatch(TmpdirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.sources = os.path.join(self.dpath, 'src')
+        os.mkdir(self.sources)
+        self.popath = os.path.join(self.dpath, 'xx.po')
+
+    def write(self, name, contents, mtime=None):
+        path = os.path.join(self.sources, name)
+        with open(path, 'w') as f:
+            f.write(contents)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def occurrences(self):
+        return {entry.msgid: entry.occurrences for entry in polib.pofile(self.popath)}
+
+    def args(self, **options):
+        return with_defaults(Args(self.popath, include=['*.js'], **options))
+
+    def test_watcher(self):
+        apath = self.write('a.js', "gettext('a');\ngettext('b');", 1000)
+        bpath = self.write('b.js', "gettext('b');", 1000)
+        watcher = Watcher([self.sources], self.args(prune=True, watch_json=os.path.join(self.dpath, '{lang}.json')))
+        watcher.write()
+        self.assertEqual({'a': [(apath, '1')], 'b': [(apath, '2'), (bpath, '1')]}, self.occurrences())
+
+        # translations made while watching are kept
+        po = polib.pofile(self.popath)
+        po.find('b').msgstr = 'B'
+        po.save()
+
+        observer = PollingObserver([self.sources], ['*.js'])
+        self.write('a.js', "gettext('c');", 2000)
+        os.remove(bpath)
+        cpath = self.write('c.js', "gettext('b');")
+        changed, deleted = observer.changes()
+        self.assertEqual(([apath, cpath], [bpath]), (changed, deleted))
+        self.assertTrue(watcher.update(changed, deleted))
+        [result] = watcher.write()
+
+        self.assertEqual({'b': [(cpath, '1')], 'c': [(apath, '1')]}, self.occurrences())
+        self.assertEqual(1, result.new_entries)
+        with open(os.path.join(self.dpath, 'xx.json')) as f:
+            self.assertEqual({'b': 'B'}, json.load(f))
+
+        # the PO file itself is not a source
+        self.assertFalse(watcher.update([self.popath], []))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is only available on Linux')
+    def test_inotify(self):
+        self.write('a.js', "gettext('a');")
+        os.mkdir(os.path.join(self.sources, 'new'))
+        observer = InotifyObserver([self.dpath], ['*.js'])
+        self.addCleanup(observer.close)
+
+        timer = threading.Timer(0.1, self.write, ('new/b.js', "gettext('b');"))
+        timer.start()
+        self.addCleanup(timer.join)
+        start = time.monotonic()
+        observer.wait(10)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(([os.path.join(self.sources, 'new', 'b.js')], []), observer.changes())
+
+
+if __name__ == '__main__':
+    unittest.main()